@@ -2,25 +2,84 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 
-db = SQLAlchemy()
+from app.utils.routing import RoutingSession, configurar_replica, activar_wal
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 
-def create_app():
+def create_app(config=None):
     app = Flask(__name__)
 
     app.config['SECRET_KEY'] = 'tu_clave_secreta_aqui'
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///profuel.db'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024
+    app.config['ADMIN_EMAILS'] = []
+    # 0 = sin sharding; N = comidas y tablas por usuario repartidas en N ficheros SQLite
+    app.config['MEAL_SHARDS'] = 0
+    app.config['MEAL_SHARD_URI'] = 'sqlite:///meals_{}.db'
+    # Réplica para las vistas de solo lectura, p. ej. 'sqlite:///file:profuel.db?mode=ro&uri=true'
+    app.config['REPLICA_DATABASE_URI'] = None
+    app.config['REPLICA_PIN_SECONDS'] = 5
+    # Destino de los recordatorios: 'outbox' (tabla notification_outbox) o 'log'
+    app.config['REMINDER_SINK'] = 'outbox'
+    # Zona horaria de los usuarios que aún no han elegido una en su perfil
+    app.config['DEFAULT_TIMEZONE'] = 'Europe/Madrid'
+    # Permite configurar sin tocar el código, p. ej. FLASK_MEAL_SHARDS=4
+    app.config.from_prefixed_env()
+    app.config.update(config or {})
+
+    from app.utils.shards import configurar_binds, crear_tablas
+    configurar_binds(app)
+    configurar_replica(app)
 
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
 
+    from app.utils.assets import init_assets
+    init_assets(app)
+
+    from app.utils.profiler import init_profiler
+    init_profiler(app)
+
+    from app.utils.storage import init_storage
+    from app.utils.thumbnails import init_thumbnails
+    init_storage(app)
+    init_thumbnails(app)
+
+    from app.utils.planner import init_planner
+    init_planner(app)
+
     from app.models.user import User, Profile, Meal
+    from app.models.sync import ChangeLog
+    from app.models.attachment import Attachment
+    from app.models.reminder import ReminderPreference, NotificationOutbox
+    from app.utils.migraciones import migrar
     with app.app_context():
-        db.create_all()
+        activar_wal(db)
+        crear_tablas(db)
+        migrar(db)
 
     from app.routes.auth import auth_routes
     app.register_blueprint(auth_routes)
 
+    from app.routes.sync import sync_routes
+    app.register_blueprint(sync_routes)
+
+    from app.routes.attachments import attachment_routes
+    app.register_blueprint(attachment_routes)
+
+    from app.routes.planner import planner_routes
+    app.register_blueprint(planner_routes)
+
+    from app.routes.reminders import reminder_routes
+    app.register_blueprint(reminder_routes)
+
+    from app.routes.admin import admin_routes
+    app.register_blueprint(admin_routes)
+
+    from app.cli import init_cli
+    init_cli(app)
+
     return app
@@ -0,0 +1,54 @@
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from app import create_app, db
+from app.utils.reminders import ReminderScheduler, NotificationSink
+
+RECORDATORIOS = 1000000
+MINUTOS = 60
+LOTE = 50000
+
+class ContadorSink(NotificationSink):
+    def __init__(self):
+        self.enviados = 0
+
+    def send(self, avisos):
+        self.enviados += len(avisos)
+
+def poblar(inicio):
+    # Un millón de recordatorios repartidos uniformemente a lo largo de 24 h
+    sql = 'INSERT INTO reminder_preference (user_id, enabled, hora, next_fire_at) VALUES (?, 1, ?, ?)'
+    conexion = db.session.connection()
+    paso = 86400 / RECORDATORIOS
+    for base in range(0, RECORDATORIOS, LOTE):
+        filas = []
+        for i in range(base, min(base + LOTE, RECORDATORIOS)):
+            disparo = inicio + timedelta(seconds=i * paso)
+            filas.append((i + 1, disparo.strftime('%H:%M:%S.000000'), disparo.strftime('%Y-%m-%d %H:%M:%S.%f')))
+        conexion.exec_driver_sql(sql, filas)
+    db.session.commit()
+
+def main():
+    with tempfile.TemporaryDirectory() as directorio:
+        app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{directorio}/profuel.db'})
+        with app.app_context():
+            inicio = datetime(2025, 1, 1, 12, 0)
+            t = time.perf_counter()
+            poblar(inicio)
+            print(f'{RECORDATORIOS} recordatorios insertados en {time.perf_counter() - t:.1f} s')
+
+            sink = ContadorSink()
+            scheduler = ReminderScheduler(sink)
+            tiempos, procesados = [], 0
+            # Un tick por minuto simulado durante MINUTOS minutos
+            for minuto in range(1, MINUTOS + 1):
+                t = time.perf_counter()
+                procesados += scheduler.tick(inicio + timedelta(minutes=minuto))
+                tiempos.append((time.perf_counter() - t) * 1000)
+            tiempos.sort()
+            print(f'{MINUTOS} ticks: {procesados} procesados, {sink.enviados} avisos')
+            print(f'ms por tick: mediana {tiempos[len(tiempos) // 2]:.1f}, máximo {tiempos[-1]:.1f}')
+
+if __name__ == '__main__':
+    main()
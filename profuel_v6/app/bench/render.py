@@ -0,0 +1,52 @@
+import time
+from datetime import date
+
+from app import create_app, db
+from app.models.user import User, Profile, Meal
+from werkzeug.security import generate_password_hash
+
+PAGINAS = ['/login', '/register', '/dashboard', '/profile', '/add_meal']
+REPETICIONES = 200
+
+def preparar(app):
+    with app.app_context():
+        user = User(email='bench@profuel.local', password=generate_password_hash('bench'))
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(Profile(user_id=user.id, sexo='M', altura=178.5, peso=77.3,
+                               fecha_nacimiento=date(1990, 3, 14), actividad=1.375))
+        db.session.add(Meal(user_id=user.id, name='Avena', date=date.today(),
+                            protein=13.7, carbs=66.3, fat=6.9, kcal=382.1))
+        db.session.commit()
+
+def medir(client, url, headers=None):
+    inicio = time.perf_counter()
+    for _ in range(REPETICIONES):
+        resp = client.get(url, headers=headers)
+    ms = (time.perf_counter() - inicio) * 1000 / REPETICIONES
+    return resp, ms
+
+def main():
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'WTF_CSRF_ENABLED': False})
+    preparar(app)
+    client = app.test_client()
+    client.post('/login', data={'email': 'bench@profuel.local', 'password': 'bench'})
+
+    print(f'{"pagina":<12}{"bytes":>8}{"ms frio":>10}{"ms/req":>10}')
+    for url in PAGINAS:
+        inicio = time.perf_counter()
+        client.get(url)
+        frio = (time.perf_counter() - inicio) * 1000
+        resp, ms = medir(client, url)
+        print(f'{url:<12}{len(resp.get_data()):>8}{frio:>10.2f}{ms:>10.2f}')
+
+    with app.test_request_context():
+        from flask import url_for
+        css = url_for('static', filename='css/style.css')
+    for encoding in ('identity', 'gzip', 'br'):
+        resp, ms = medir(client, css, {'Accept-Encoding': encoding})
+        print(f'{"css " + encoding:<12}{len(resp.get_data()):>8}{ms:>10.2f}  '
+              f'{resp.headers.get("Cache-Control")}')
+
+if __name__ == '__main__':
+    main()
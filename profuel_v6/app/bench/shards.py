@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+from multiprocessing import Pool
+from uuid import uuid4
+
+from app import create_app, db
+from app.utils.shards import engine_para, shard_para
+
+PROCESOS = 8
+ESCRITURAS = 300
+SHARDS = [1, 2, 4, 8]
+
+def config(directorio, n_shards):
+    return {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{directorio}/profuel.db',
+            'MEAL_SHARDS': n_shards,
+            'MEAL_SHARD_URI': f'sqlite:///{directorio}/meals_{{}}.db'}
+
+INSERT = ('INSERT INTO meal (user_id, name, date, day_key, protein, carbs, fat, kcal, client_id, updated_at, deleted) '
+          'VALUES (?, ?, ?, ?, 20, 50, 10, 370, ?, ?, 0)')
+
+def escritor(args):
+    directorio, n_shards, user_id = args
+    app = create_app(config(directorio, n_shards))
+    with app.app_context():
+        hoy = date.today()
+        # SQL directo: con el ORM el coste por commit es CPU y no se ve el efecto del bloqueo por fichero
+        with engine_para(db, user_id).connect() as conexion:
+            conexion.exec_driver_sql('PRAGMA synchronous=FULL')
+            conexion.commit()
+            inicio = time.time()
+            # Una transacción (y un fsync) por comida, como add_meal
+            for i in range(ESCRITURAS):
+                with conexion.begin():
+                    conexion.exec_driver_sql(INSERT, (user_id, f'bench {i}', hoy.isoformat(), hoy.toordinal(),
+                                                      str(uuid4()), datetime.utcnow().isoformat(' ')))
+            return inicio, time.time()
+
+def usuarios_repartidos(n_shards):
+    # Un usuario por proceso, repartidos por igual entre los shards
+    usuarios, user_id = [], 0
+    while len(usuarios) < PROCESOS:
+        user_id += 1
+        if shard_para(user_id, n_shards) == len(usuarios) % n_shards:
+            usuarios.append(user_id)
+    return usuarios
+
+def medir(n_shards):
+    with tempfile.TemporaryDirectory() as directorio:
+        create_app(config(directorio, n_shards))
+        with Pool(PROCESOS) as pool:
+            tiempos = pool.map(escritor, [(directorio, n_shards, u) for u in usuarios_repartidos(n_shards)])
+        duracion = max(fin for _, fin in tiempos) - min(inicio for inicio, _ in tiempos)
+        return PROCESOS * ESCRITURAS / duracion
+
+def main():
+    shards = [int(n) for n in sys.argv[1:]] or SHARDS
+    print(f'{PROCESOS} procesos x {ESCRITURAS} commits (synchronous=FULL), {os.cpu_count()} CPU, '
+          f'en {tempfile.gettempdir()}')
+    print(f'{"shards":>6}{"escrituras/s":>14}')
+    for n in shards:
+        print(f'{n:>6}{medir(n):>14.0f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import click
+from flask.cli import FlaskGroup
+
+from app import db
+from app.utils.seed import generar_poblacion, PASSWORD
+from app.utils.shards import rebalancear
+from app.utils.reminders import ReminderScheduler, get_sink
+from app.utils.migraciones import migrar
+
+@click.command('seed')
+@click.option('--usuarios', default=100, show_default=True, help='Número de usuarios a generar.')
+@click.option('--dias', default=365, show_default=True, help='Días de historial de comidas por usuario.')
+@click.option('--seed', default=42, show_default=True, help='Semilla del generador (resultados reproducibles).')
+@click.option('--hasta', type=click.DateTime(['%Y-%m-%d']), default=None,
+              help='Último día del historial (por defecto, hoy).')
+def seed_command(usuarios, dias, seed, hasta):
+    """Genera una población sintética de usuarios, perfiles y comidas."""
+    r = generar_poblacion(usuarios, dias, seed, hasta.date() if hasta else None)
+    click.echo(f"{r['usuarios']} usuarios, {r['comidas']} comidas en {r['segundos']:.2f} s "
+               f"({r['filas_por_segundo']} filas/s). Contraseña: {PASSWORD}")
+
+@click.command('rebalance-shards')
+@click.option('--desde', type=int, required=True,
+              help='Número de shards con el que se escribieron los datos (0 = sin sharding).')
+def rebalance_shards_command(desde):
+    """Mueve comidas, cambios y adjuntos de cada usuario a su shard según MEAL_SHARDS."""
+    r = rebalancear(db, desde)
+    click.echo(f"{r['usuarios']} usuarios movidos ({r['filas']} filas).")
+
+@click.command('reminders')
+@click.option('--intervalo', default=1.0, show_default=True, help='Segundos entre ticks.')
+@click.option('--max-por-tick', default=1000, show_default=True, help='Recordatorios procesados como mucho en cada tick.')
+@click.option('--una-vez', is_flag=True, help='Ejecuta un único tick y termina.')
+def reminders_command(intervalo, max_por_tick, una_vez):
+    """Ejecuta el scheduler de recordatorios (un único proceso por despliegue)."""
+    scheduler = ReminderScheduler(get_sink(), max_por_tick=max_por_tick)
+    if una_vez:
+        click.echo(f'{scheduler.tick()} recordatorios procesados.')
+    else:
+        scheduler.ejecutar(intervalo)
+
+@click.command('migrate')
+def migrate_command():
+    """Añade columnas e índices que faltan en bases de datos de versiones anteriores."""
+    r = migrar(db)
+    for cambio in r['columnas'] + r['indices']:
+        click.echo(cambio)
+    if r['duplicados']:
+        click.echo('Cuentas que solo difieren en mayúsculas (fusiónalas y vuelve a ejecutar migrate):', err=True)
+        for email, ids in r['duplicados']:
+            click.echo(f"  {email}: ids {', '.join(map(str, ids))}", err=True)
+        raise SystemExit(1)
+    click.echo('Esquema al día.')
+
+def init_cli(app):
+    app.cli.add_command(seed_command)
+    app.cli.add_command(rebalance_shards_command)
+    app.cli.add_command(reminders_command)
+    app.cli.add_command(migrate_command)
+
+if __name__ == '__main__':
+    from app import create_app
+    FlaskGroup(create_app=create_app)()
@@ -1,6 +1,9 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileAllowed
 from wtforms import StringField, FloatField, DateField, SubmitField
-from wtforms.validators import DataRequired
+from wtforms.validators import DataRequired, ValidationError
+
+from app.utils.storage import tipo_imagen
 
 class MealForm(FlaskForm):
     name = StringField('Nombre de la comida', validators=[DataRequired()])
@@ -8,4 +11,10 @@ class MealForm(FlaskForm):
     protein = FloatField('Proteínas (g)', validators=[DataRequired()])
     carbs = FloatField('Carbohidratos (g)', validators=[DataRequired()])
     fat = FloatField('Grasas (g)', validators=[DataRequired()])
+    foto = FileField('Foto o código de barras', validators=[FileAllowed(['jpg', 'jpeg', 'png', 'gif', 'webp'], 'Solo imágenes.')])
     submit = SubmitField('Añadir comida')
+
+    def validate_foto(self, field):
+        # La extensión la elige el cliente; el contenido manda
+        if field.data and tipo_imagen(field.data.stream) is None:
+            raise ValidationError('Solo imágenes JPEG, PNG, GIF o WebP.')
@@ -1,6 +1,18 @@
 from flask_wtf import FlaskForm
+from markupsafe import Markup, escape
 from wtforms import FloatField, DateField, SubmitField, SelectField
 from wtforms.validators import DataRequired
+from wtforms.widgets import Select
+
+from app.utils.fechas import zonas_validas
+
+class SelectCompacto(Select):
+    # Cientos de zonas: <option>Europe/Madrid</option> en vez de repetir el nombre en value
+    @classmethod
+    def render_option(cls, value, label, selected, **kwargs):
+        if value != label:
+            return super().render_option(value, label, selected, **kwargs)
+        return Markup(f'<option{" selected" if selected else ""}>{escape(label)}</option>')
 
 class ProfileForm(FlaskForm):
     sexo = SelectField('Sexo', choices=[('M', 'Masculino'), ('F', 'Femenino')], validators=[DataRequired()])
@@ -14,4 +26,10 @@ class ProfileForm(FlaskForm):
         ('1.725', 'Muy activo (ejercicio 6-7 días/semana)'),
         ('1.9', 'Extremadamente activo (entrenamiento 2 veces al día)')
     ], validators=[DataRequired()])
+    timezone = SelectField('Zona horaria', widget=SelectCompacto(), validators=[DataRequired()])
     submit = SubmitField('Guardar')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Por petición y no al importar: dependen de DEFAULT_TIMEZONE
+        self.timezone.choices = zonas_validas()
@@ -0,0 +1,8 @@
+from flask_wtf import FlaskForm
+from wtforms import BooleanField, TimeField, SubmitField
+from wtforms.validators import DataRequired
+
+class ReminderForm(FlaskForm):
+    enabled = BooleanField('Avisarme si no he registrado ninguna comida')
+    hora = TimeField('Hora del aviso', format='%H:%M', validators=[DataRequired()])
+    submit = SubmitField('Guardar')
@@ -0,0 +1,25 @@
+from datetime import datetime, time
+
+from app import db
+
+class ReminderPreference(db.Model):
+    __tablename__ = 'reminder_preference'
+    # El scheduler recorre este índice por rangos de next_fire_at
+    __table_args__ = (db.Index('ix_reminder_next_fire', 'enabled', 'next_fire_at'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    hora = db.Column(db.Time, nullable=False, default=time(20, 0))
+    next_fire_at = db.Column(db.DateTime)
+    # Lo fija la web al crear o mover un recordatorio (no el scheduler): su máximo indica que hay que recargar
+    updated_at = db.Column(db.DateTime, index=True)
+
+class NotificationOutbox(db.Model):
+    __tablename__ = 'notification_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    mensaje = db.Column(db.String(255), nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
@@ -0,0 +1,15 @@
+from app import db
+
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+    # AUTOINCREMENT: los números de secuencia no se reutilizan aunque se compacte el log
+    __table_args__ = (
+        db.Index('ix_change_log_user_seq', 'user_id', 'id'),
+        db.Index('ix_change_log_user_entity', 'user_id', 'entity', 'entity_id'),
+        {'sqlite_autoincrement': True},
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)
+    entity_id = db.Column(db.String(36), nullable=False)
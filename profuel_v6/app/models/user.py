@@ -1,11 +1,25 @@
+from datetime import datetime
+from uuid import uuid4
+
 from app import db, login_manager
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
+
+def normalizar_email(email):
+    return email.strip().lower()
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(150), unique=True, nullable=False)
+    email = db.Column(db.String(150), nullable=False)
+    # La unicidad la garantiza este índice, no una consulta previa al insert
+    email_normalized = db.Column(db.String(150), unique=True, nullable=False)
     password = db.Column(db.String(150), nullable=False)
 
+    @validates('email')
+    def validate_email(self, key, email):
+        self.email_normalized = normalizar_email(email)
+        return email
+
 class Profile(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -14,16 +28,33 @@ class Profile(db.Model):
     peso = db.Column(db.Float)
     fecha_nacimiento = db.Column(db.Date)
     actividad = db.Column(db.Float, default=1.55)
+    timezone = db.Column(db.String(64))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class Meal(db.Model):
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'client_id'),
+        db.Index('ix_meal_user_day', 'user_id', 'day_key'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(150), nullable=False)
     date = db.Column(db.Date, nullable=False)
+    # Día local del usuario (date.toordinal()); todas las agregaciones diarias y semanales van por aquí
+    day_key = db.Column(db.Integer, nullable=False)
     protein = db.Column(db.Float, nullable=False)
     carbs = db.Column(db.Float, nullable=False)
     fat = db.Column(db.Float, nullable=False)
     kcal = db.Column(db.Float, nullable=False)
+    client_id = db.Column(db.String(36), nullable=False, default=lambda: str(uuid4()))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted = db.Column(db.Boolean, nullable=False, default=False)
+
+    @validates('date')
+    def validate_date(self, key, fecha):
+        self.day_key = fecha.toordinal()
+        return fecha
 
 @login_manager.user_loader
 def load_user(user_id):
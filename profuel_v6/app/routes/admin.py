@@ -0,0 +1,75 @@
+from functools import wraps
+
+from flask import Blueprint, request, jsonify, abort, current_app, Response
+from flask_login import login_required, current_user
+
+from app.models.user import normalizar_email
+
+admin_routes = Blueprint('admin', __name__, url_prefix='/admin')
+
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        admins = {normalizar_email(e) for e in current_app.config['ADMIN_EMAILS']}
+        if current_user.email_normalized not in admins:
+            abort(403)
+        return view(*args, **kwargs)
+    return wrapper
+
+def solo_json(view):
+    # Un formulario de otro sitio no puede enviar application/json sin preflight CORS: sin CSRF, solo JSON
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not request.is_json:
+            return jsonify(error='Se esperaba Content-Type: application/json.'), 415
+        return view(*args, **kwargs)
+    return wrapper
+
+def get_profiler():
+    return current_app.extensions['profiler']
+
+@admin_routes.route('/profiler')
+@admin_required
+def profiler_status():
+    return jsonify(get_profiler().resumen(request.args.get('top', 20, type=int)))
+
+@admin_routes.route('/profiler/start', methods=['POST'])
+@admin_required
+@solo_json
+def profiler_start():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(error='Se esperaba un objeto JSON.'), 400
+    try:
+        peticiones = int(data.get('requests', 10))
+        intervalo = float(data.get('interval_ms', 5)) / 1000
+        user_id = int(data['user_id']) if data.get('user_id') else None
+    except (TypeError, ValueError):
+        return jsonify(error='Parámetros inválidos.'), 400
+    endpoint = data.get('endpoint') or None
+    if endpoint and endpoint not in current_app.view_functions:
+        return jsonify(error=f'Endpoint desconocido: {endpoint}'), 400
+
+    get_profiler().armar(endpoint=endpoint, user_id=user_id, peticiones=peticiones, intervalo=intervalo)
+    return jsonify(get_profiler().resumen())
+
+@admin_routes.route('/profiler/stop', methods=['POST'])
+@admin_required
+@solo_json
+def profiler_stop():
+    get_profiler().desarmar()
+    return jsonify(get_profiler().resumen())
+
+@admin_routes.route('/profiler/collapsed')
+@admin_required
+def profiler_collapsed():
+    return Response(get_profiler().colapsado(), mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=profuel.collapsed'})
+
+@admin_routes.route('/profiler/speedscope')
+@admin_required
+def profiler_speedscope():
+    resp = jsonify(get_profiler().speedscope())
+    resp.headers['Content-Disposition'] = 'attachment; filename=profuel.speedscope.json'
+    return resp
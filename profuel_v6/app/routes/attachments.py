@@ -0,0 +1,49 @@
+from flask import Blueprint, request, jsonify, abort
+from flask_login import login_required, current_user
+
+from app import db
+from app.models.user import Meal
+from app.models.attachment import Attachment
+from app.utils.storage import get_store, guardar_adjunto, encolar_thumbnail, tipo_imagen
+from app.utils.thumbnails import thumbnail_key
+from app.utils.routing import lectura_en_replica
+
+attachment_routes = Blueprint('attachments', __name__)
+
+def adjunto_del_usuario(attachment_id):
+    attachment = Attachment.query.filter_by(id=attachment_id, user_id=current_user.id).first()
+    if attachment is None:
+        abort(404)
+    return attachment
+
+@attachment_routes.route('/meals/<client_id>/attachments', methods=['POST'])
+@login_required
+def upload(client_id):
+    meal = Meal.query.filter_by(user_id=current_user.id, client_id=client_id, deleted=False).first()
+    if meal is None:
+        abort(404)
+    fichero = request.files.get('file')
+    content_type = tipo_imagen(fichero.stream) if fichero is not None else None
+    if content_type is None:
+        return jsonify(error='Se esperaba una imagen JPEG, PNG, GIF o WebP en el campo "file".'), 400
+
+    attachment = guardar_adjunto(meal, fichero, content_type)
+    db.session.commit()
+    encolar_thumbnail(attachment)
+    return jsonify(id=attachment.id, sha256=attachment.sha256, size=attachment.size), 201
+
+@attachment_routes.route('/attachments/<int:attachment_id>')
+@login_required
+@lectura_en_replica
+def download(attachment_id):
+    attachment = adjunto_del_usuario(attachment_id)
+    return get_store().send(attachment.sha256, attachment.content_type)
+
+@attachment_routes.route('/attachments/<int:attachment_id>/thumb')
+@login_required
+@lectura_en_replica
+def thumbnail(attachment_id):
+    attachment = adjunto_del_usuario(attachment_id)
+    if not attachment.has_thumbnail:
+        abort(404)
+    return get_store().send(thumbnail_key(attachment.sha256), 'image/jpeg')
@@ -1,13 +1,21 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import login_user, logout_user, login_required, current_user
-from datetime import date
+from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
 
 from app import db
-from app.models.user import User, Profile, Meal
+from app.models.user import User, Profile, Meal, normalizar_email
+from app.models.reminder import ReminderPreference
 from app.forms.profile_form import ProfileForm
 from app.forms.meal_form import MealForm
 from app.utils.calculos import calcular_edad, calcular_bmr, calcular_tdee, calcular_kcal
+from app.utils.sync import registrar_cambio
+from app.utils.storage import guardar_adjunto, encolar_thumbnail, tipo_imagen
+from app.utils.routing import lectura_en_replica
+from app.utils.planner import invalidar_plan
+from app.utils.fechas import hoy_en, totales, zona_de
+from app.utils.reminders import programar
 
 auth_routes = Blueprint('auth', __name__)
 
@@ -21,14 +29,14 @@ def register():
         email = request.form['email']
         password = request.form['password']
 
-        user = User.query.filter_by(email=email).first()
-        if user:
-            flash('El usuario ya existe.')
-            return redirect(url_for('auth.register'))
-
         new_user = User(email=email, password=generate_password_hash(password))
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('El usuario ya existe.')
+            return redirect(url_for('auth.register'))
         flash('Registro exitoso. Ahora puedes iniciar sesión.')
         return redirect(url_for('auth.login'))
     return render_template('register.html')
@@ -39,7 +47,7 @@ def login():
         email = request.form['email']
         password = request.form['password']
 
-        user = User.query.filter_by(email=email).first()
+        user = User.query.filter_by(email_normalized=normalizar_email(email)).first()
         if not user or not check_password_hash(user.password, password):
             flash('Credenciales inválidas.')
             return redirect(url_for('auth.login'))
@@ -50,23 +58,22 @@ def login():
 
 @auth_routes.route('/dashboard')
 @login_required
+@lectura_en_replica
 def dashboard():
     profile = Profile.query.filter_by(user_id=current_user.id).first()
     if profile:
-        edad = calcular_edad(profile.fecha_nacimiento)
+        hoy = hoy_en(profile)
+        edad = calcular_edad(profile.fecha_nacimiento, hoy)
         bmr = calcular_bmr(profile.sexo, profile.peso, profile.altura, edad)
         tdee = calcular_tdee(bmr, float(profile.actividad))
 
-        hoy = date.today()
-        meals = Meal.query.filter_by(user_id=current_user.id, date=hoy).all()
-        total_proteinas = sum(m.protein for m in meals)
-        total_carbs = sum(m.carbs for m in meals)
-        total_grasas = sum(m.fat for m in meals)
-        total_kcal = sum(m.kcal for m in meals)
+        total_kcal, total_proteinas, total_carbs, total_grasas = totales(current_user.id, hoy, hoy)
+        kcal_semana = totales(current_user.id, hoy - timedelta(days=6), hoy)[0]
 
-        return render_template('dashboard.html', profile=profile, edad=edad, bmr=bmr, tdee=tdee,
-                                total_kcal=total_kcal, total_proteinas=total_proteinas,
-                                total_carbs=total_carbs, total_grasas=total_grasas)
+        return render_template('dashboard.html', profile=profile, edad=edad, bmr=round(bmr), tdee=round(tdee),
+                                total_kcal=round(total_kcal), total_proteinas=round(total_proteinas, 1),
+                                total_carbs=round(total_carbs, 1), total_grasas=round(total_grasas, 1),
+                                media_kcal_semana=round(kcal_semana / 7))
     else:
         flash("Por favor, completa tu perfil primero.")
         return redirect(url_for('auth.profile'))
@@ -89,6 +96,8 @@ def profile():
         form.peso.data = profile.peso
         form.fecha_nacimiento.data = profile.fecha_nacimiento
         form.actividad.data = str(profile.actividad)
+    if request.method == 'GET':
+        form.timezone.data = str(zona_de(profile))
 
     if form.validate_on_submit():
         if not profile:
@@ -96,6 +105,11 @@ def profile():
         form.populate_obj(profile)
         profile.actividad = float(form.actividad.data)
         db.session.add(profile)
+        registrar_cambio(current_user.id, 'profile', 'profile')
+        # El recordatorio se dispara a la hora local: si cambia la zona, cambia el instante
+        pref = ReminderPreference.query.filter_by(user_id=current_user.id, enabled=True).first()
+        if pref:
+            programar(pref, zona_de(profile))
         db.session.commit()
         flash('Perfil actualizado correctamente.')
         return redirect(url_for('auth.dashboard'))
@@ -106,12 +120,22 @@ def profile():
 @login_required
 def add_meal():
     form = MealForm()
+    if request.method == 'GET':
+        form.date.data = hoy_en(Profile.query.filter_by(user_id=current_user.id).first())
     if form.validate_on_submit():
         kcal = calcular_kcal(form.protein.data, form.carbs.data, form.fat.data)
         meal = Meal(user_id=current_user.id, name=form.name.data, date=form.date.data,
                     protein=form.protein.data, carbs=form.carbs.data, fat=form.fat.data, kcal=kcal)
         db.session.add(meal)
+        db.session.flush()
+        registrar_cambio(current_user.id, 'meal', meal.client_id)
+        attachment = None
+        if form.foto.data:
+            attachment = guardar_adjunto(meal, form.foto.data, tipo_imagen(form.foto.data.stream))
         db.session.commit()
+        invalidar_plan(current_user.id)
+        if attachment:
+            encolar_thumbnail(attachment)
         flash('Comida añadida correctamente.')
         return redirect(url_for('auth.dashboard'))
     return render_template('add_meal.html', form=form)
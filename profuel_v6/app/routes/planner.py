@@ -0,0 +1,33 @@
+from flask import Blueprint, render_template, redirect, url_for, flash
+from flask_login import login_required, current_user
+
+from app.models.user import Profile
+from app.utils.calculos import calcular_edad, calcular_bmr, calcular_tdee, calcular_macros
+from app.utils.planner import planificar
+from app.utils.routing import lectura_en_replica
+from app.utils.fechas import hoy_en, totales
+
+planner_routes = Blueprint('planner', __name__)
+
+@planner_routes.route('/plan')
+@login_required
+@lectura_en_replica
+def plan():
+    profile = Profile.query.filter_by(user_id=current_user.id).first()
+    if not profile:
+        flash("Por favor, completa tu perfil primero.")
+        return redirect(url_for('auth.profile'))
+
+    # El día, y con él la caché del planificador, cambia a medianoche del usuario
+    hoy = hoy_en(profile)
+    edad = calcular_edad(profile.fecha_nacimiento, hoy)
+    tdee = calcular_tdee(calcular_bmr(profile.sexo, profile.peso, profile.altura, edad), float(profile.actividad))
+    objetivo = (tdee,) + calcular_macros(tdee, profile.peso)
+
+    consumido = totales(current_user.id, hoy, hoy)
+    restantes = tuple(meta - valor for meta, valor in zip(objetivo, consumido))
+
+    raciones = planificar(current_user.id, hoy, restantes)
+    totales_plan = [round(sum(getattr(c, campo) * n for c, n in raciones)) for campo in ('kcal', 'protein', 'carbs', 'fat')]
+    return render_template('plan.html', restantes=[round(max(v, 0)) for v in restantes],
+                           raciones=raciones, totales=totales_plan)
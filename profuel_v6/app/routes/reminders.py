@@ -0,0 +1,35 @@
+from flask import Blueprint, render_template, redirect, url_for, flash, request
+from flask_login import login_required, current_user
+
+from app import db
+from app.models.user import Profile
+from app.models.reminder import ReminderPreference
+from app.forms.reminder_form import ReminderForm
+from app.utils.reminders import programar
+from app.utils.fechas import zona_de
+
+reminder_routes = Blueprint('reminders', __name__)
+
+@reminder_routes.route('/reminders', methods=['GET', 'POST'])
+@login_required
+def reminders():
+    form = ReminderForm()
+    pref = ReminderPreference.query.filter_by(user_id=current_user.id).first()
+
+    if request.method == 'GET':
+        form.enabled.data = pref.enabled if pref else False
+        if pref:
+            form.hora.data = pref.hora
+
+    if form.validate_on_submit():
+        if not pref:
+            pref = ReminderPreference(user_id=current_user.id)
+        form.populate_obj(pref)
+        tz = zona_de(Profile.query.filter_by(user_id=current_user.id).first())
+        programar(pref, tz)
+        db.session.add(pref)
+        db.session.commit()
+        flash('Recordatorios actualizados.')
+        return redirect(url_for('auth.dashboard'))
+
+    return render_template('reminders.html', form=form)
@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from sqlalchemy.exc import StatementError
+
+from app import db
+from app.utils.sync import aplicar_meals, aplicar_perfil, cambios_desde, ultimo_token, registrar_cambio
+from app.utils.planner import invalidar_plan
+
+sync_routes = Blueprint('sync', __name__)
+
+# Los ids de change_log son INTEGER de SQLite (64 bits con signo)
+TOKEN_MAXIMO = 2 ** 63 - 1
+
+@sync_routes.route('/sync', methods=['POST'])
+@login_required
+def sync():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify(error='Se esperaba un objeto JSON.'), 400
+
+    try:
+        token = int(data.get('token') or 0)
+    except (TypeError, ValueError, OverflowError):
+        token = -1
+    if isinstance(data.get('token'), bool) or not 0 <= token <= TOKEN_MAXIMO:
+        # Se comprueba antes de escribir: un token inválido no debe dejar el lote aplicado
+        return jsonify(error='Datos inválidos: token debe ser un entero entre 0 y 2^63-1'), 400
+
+    try:
+        aceptados, rechazados = aplicar_meals(current_user.id, data.get('meals') or [])
+        perfil_aceptado = False
+        if data.get('profile'):
+            perfil_aceptado = aplicar_perfil(current_user.id, data['profile'])
+        db.session.flush()
+    except (KeyError, TypeError, ValueError, StatementError) as e:
+        db.session.rollback()
+        return jsonify(error=f'Datos inválidos: {e}'), 400
+
+    db.session.commit()
+    if aceptados:
+        invalidar_plan(current_user.id)
+
+    # El token se fija antes de leer el delta: un cambio concurrente se repetirá, nunca se perderá
+    nuevo_token = ultimo_token(current_user.id)
+    if not nuevo_token:
+        # Log vacío: sin una marca, el token seguiría en 0 y cada sync descargaría todo otra vez
+        registrar_cambio(current_user.id, 'profile', 'profile')
+        db.session.commit()
+        nuevo_token = ultimo_token(current_user.id)
+    meals, profile = cambios_desde(current_user.id, token, aceptados, rechazados, perfil_aceptado)
+    return jsonify(token=nuevo_token, meals=meals, profile=profile,
+                   accepted=sorted(aceptados), rejected=sorted(rechazados))
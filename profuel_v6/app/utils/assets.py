@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+from flask import request, abort, Response
+from jinja2 import FileSystemBytecodeCache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+UN_ANIO = 365 * 24 * 3600
+
+class AssetManifest:
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.hashes = {}
+        self.variantes = {}
+        self.mimetypes = {}
+        self.cargar()
+
+    def cargar(self):
+        # Los estáticos son pocos y pequeños: se precomprimen una vez, en memoria
+        for raiz, _, ficheros in os.walk(self.static_folder):
+            for nombre in ficheros:
+                ruta = os.path.join(raiz, nombre)
+                filename = os.path.relpath(ruta, self.static_folder).replace(os.sep, '/')
+                with open(ruta, 'rb') as f:
+                    contenido = f.read()
+                self.mimetypes[filename] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+                self.hashes[filename] = hashlib.sha256(contenido).hexdigest()[:12]
+                variantes = {'identity': contenido, 'gzip': gzip.compress(contenido, 9, mtime=0)}
+                if brotli is not None:
+                    variantes['br'] = brotli.compress(contenido, quality=11)
+                # Una variante que no ahorra bytes no merece servirse
+                self.variantes[filename] = {k: v for k, v in variantes.items()
+                                            if k == 'identity' or len(v) < len(contenido)}
+
+    def encoding_para(self, filename):
+        disponibles = self.variantes[filename]
+        for encoding in ('br', 'gzip'):
+            if encoding in disponibles and request.accept_encodings[encoding]:
+                return encoding
+        return 'identity'
+
+def init_assets(app):
+    manifest = AssetManifest(app.static_folder)
+    app.extensions['assets'] = manifest
+
+    cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+
+    @app.url_defaults
+    def fingerprint_estaticos(endpoint, values):
+        if endpoint == 'static' and 'v' not in values:
+            version = manifest.hashes.get(values.get('filename'))
+            if version:
+                values['v'] = version
+
+    def servir_estatico(filename):
+        if filename not in manifest.variantes:
+            abort(404)
+        encoding = manifest.encoding_para(filename)
+        resp = Response(manifest.variantes[filename][encoding], mimetype=manifest.mimetypes[filename])
+        if encoding != 'identity':
+            resp.headers['Content-Encoding'] = encoding
+        resp.headers['Vary'] = 'Accept-Encoding'
+        resp.set_etag(f'{manifest.hashes[filename]}-{encoding}')
+        if request.args.get('v') == manifest.hashes[filename]:
+            resp.headers['Cache-Control'] = f'public, max-age={UN_ANIO}, immutable'
+        else:
+            resp.headers['Cache-Control'] = 'no-cache'
+        return resp.make_conditional(request)
+
+    app.view_functions['static'] = servir_estatico
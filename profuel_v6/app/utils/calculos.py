@@ -1,7 +1,7 @@
 from datetime import date
 
-def calcular_edad(fecha_nacimiento):
-    hoy = date.today()
+def calcular_edad(fecha_nacimiento, hoy=None):
+    hoy = hoy or date.today()
     return hoy.year - fecha_nacimiento.year - ((hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
 
 def calcular_bmr(sexo, peso, altura, edad):
@@ -15,3 +15,10 @@ def calcular_tdee(bmr, factor_actividad):
 
 def calcular_kcal(proteinas, carbohidratos, grasas):
     return (proteinas * 4) + (carbohidratos * 4) + (grasas * 9)
+
+def calcular_macros(tdee, peso):
+    # Proteína 1.8 g/kg, grasa 25 % de las kcal, el resto carbohidratos
+    proteinas = 1.8 * peso
+    grasas = tdee * 0.25 / 9
+    carbohidratos = max(tdee - proteinas * 4 - grasas * 9, 0) / 4
+    return proteinas, carbohidratos, grasas
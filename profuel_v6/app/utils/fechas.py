@@ -0,0 +1,54 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError, available_timezones
+
+from flask import current_app
+
+from app import db
+from app.models.user import Meal
+
+# Zonas Área/Ciudad: fuera quedan localtime (la zona del servidor), Factory, Etc/*, posix/* y alias como US/*
+AREAS = ('Africa', 'America', 'Antarctica', 'Arctic', 'Asia', 'Atlantic', 'Australia', 'Europe', 'Indian', 'Pacific')
+
+@lru_cache(maxsize=1)
+def zonas_canonicas():
+    # Recorre la base de datos de zonas (sistema o paquete tzdata); sin ninguna de las dos queda vacía
+    return frozenset(z for z in available_timezones() if '/' in z and z.split('/', 1)[0] in AREAS)
+
+@lru_cache(maxsize=4)
+def _zonas_validas(por_defecto):
+    return tuple(sorted(zonas_canonicas() | {por_defecto, 'UTC'}))
+
+def zonas_validas():
+    # La zona por defecto y UTC siempre valen: sin tzdata zona() las resuelve igualmente (UTC como último recurso)
+    return _zonas_validas(current_app.config['DEFAULT_TIMEZONE'])
+
+def zona(nombre):
+    # Zona del usuario, si no la por defecto y, si tampoco existe (sin tzdata), UTC
+    for candidata in (nombre, current_app.config['DEFAULT_TIMEZONE']):
+        if not candidata:
+            continue
+        try:
+            return ZoneInfo(candidata)
+        except (ZoneInfoNotFoundError, ValueError):
+            pass
+    return timezone.utc
+
+def zona_de(profile):
+    return zona(profile.timezone if profile else None)
+
+def hoy_en(profile, ahora_utc=None):
+    ahora = (ahora_utc or datetime.utcnow()).replace(tzinfo=timezone.utc)
+    return ahora.astimezone(zona_de(profile)).date()
+
+def clave_dia(fecha):
+    return fecha.toordinal()
+
+def totales(user_id, desde, hasta):
+    # Suma de kcal, proteínas, carbohidratos y grasas entre dos días locales (incluidos), sobre ix_meal_user_day
+    fila = (db.session.query(db.func.sum(Meal.kcal), db.func.sum(Meal.protein),
+                             db.func.sum(Meal.carbs), db.func.sum(Meal.fat))
+            .filter(Meal.user_id == user_id, Meal.day_key.between(clave_dia(desde), clave_dia(hasta)),
+                    Meal.deleted.is_(False))
+            .one())
+    return tuple(v or 0 for v in fila)
@@ -0,0 +1,117 @@
+import logging
+
+from flask import current_app
+
+from app.models.user import normalizar_email
+from app.utils.shards import engines_shard
+
+logger = logging.getLogger('profuel.migraciones')
+
+# Columnas añadidas a tablas que ya existían en la versión anterior: create_all no altera tablas
+# existentes. SQLite no admite NOT NULL sin un DEFAULT constante en ADD COLUMN, así que se
+# añaden con su relleno y la aplicación siempre las escribe.
+COLUMNAS = {
+    'user': [
+        ('email_normalized', 'VARCHAR(150)', None),  # se rellena en Python con normalizar_email
+    ],
+    'profile': [
+        ('timezone', 'VARCHAR(64)', None),
+        ('updated_at', 'DATETIME', "datetime('now')"),
+    ],
+    'meal': [
+        # date.toordinal(): julianday('0001-01-01') = 1721425.5 y ese día es el ordinal 1
+        ('day_key', 'INTEGER', 'CAST(julianday(date) - 1721424.5 AS INTEGER)'),
+        ('client_id', 'VARCHAR(36)', 'lower(hex(randomblob(16)))'),
+        ('updated_at', 'DATETIME', "datetime('now')"),
+        ('deleted', 'BOOLEAN NOT NULL DEFAULT 0', None),
+    ],
+    'reminder_preference': [
+        ('updated_at', 'DATETIME', None),
+    ],
+}
+
+# (nombre, único, columnas): equivalen a las restricciones que declaran los modelos
+INDICES = {
+    'user': [('ix_user_email_normalized', True, ('email_normalized',))],
+    'meal': [('uq_meal_user_client', True, ('user_id', 'client_id')),
+             ('ix_meal_user_day', False, ('user_id', 'day_key'))],
+    'reminder_preference': [('ix_reminder_preference_updated_at', False, ('updated_at',))],
+}
+
+def columnas_de(conexion, tabla):
+    return {fila[1] for fila in conexion.exec_driver_sql(f'PRAGMA table_info("{tabla}")')}
+
+def indices_de(conexion, tabla):
+    # {columnas: único} para todos los índices, incluidos los autoíndices de UNIQUE en línea
+    indices = {}
+    for fila in conexion.exec_driver_sql(f'PRAGMA index_list("{tabla}")'):
+        columnas = tuple(c[2] for c in conexion.exec_driver_sql(f'PRAGMA index_info("{fila[1]}")'))
+        indices[columnas] = indices.get(columnas, False) or bool(fila[2])
+    return indices
+
+def duplicados_email(conexion):
+    filas = conexion.exec_driver_sql(
+        'SELECT email_normalized, group_concat(id) FROM user '
+        'GROUP BY email_normalized HAVING count(*) > 1 ORDER BY email_normalized').all()
+    return [(email, sorted(int(i) for i in ids.split(','))) for email, ids in filas]
+
+def rellenar_emails(conexion):
+    filas = conexion.exec_driver_sql('SELECT id, email FROM user').all()
+    if filas:
+        conexion.exec_driver_sql('UPDATE user SET email_normalized = ? WHERE id = ?',
+                                 [(normalizar_email(email), user_id) for user_id, email in filas])
+
+def migrar_engine(engine, informe):
+    with engine.begin() as conexion:
+        tablas = {fila[0] for fila in conexion.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for tabla, columnas in COLUMNAS.items():
+            if tabla not in tablas:
+                continue
+            existentes = columnas_de(conexion, tabla)
+            for nombre, tipo, relleno in columnas:
+                if nombre in existentes:
+                    continue
+                conexion.exec_driver_sql(f'ALTER TABLE "{tabla}" ADD COLUMN {nombre} {tipo}')
+                if relleno:
+                    conexion.exec_driver_sql(f'UPDATE "{tabla}" SET {nombre} = {relleno}')
+                elif tabla == 'user' and nombre == 'email_normalized':
+                    rellenar_emails(conexion)
+                informe['columnas'].append(f'{engine.url.database}: {tabla}.{nombre}')
+
+        for tabla, indices in INDICES.items():
+            if tabla not in tablas:
+                continue
+            existentes = indices_de(conexion, tabla)
+            for nombre, unico, columnas in indices:
+                if columnas in existentes and (existentes[columnas] or not unico):
+                    continue
+                if tabla == 'user':
+                    # Cuentas que solo difieren en mayúsculas: hay que fusionarlas a mano antes del índice único
+                    duplicados = duplicados_email(conexion)
+                    if duplicados:
+                        informe['duplicados'].extend(duplicados)
+                        continue
+                conexion.exec_driver_sql(
+                    f'CREATE {"UNIQUE " if unico else ""}INDEX IF NOT EXISTS {nombre} '
+                    f'ON "{tabla}" ({", ".join(columnas)})')
+                informe['indices'].append(f'{engine.url.database}: {nombre}')
+
+def migrar(db):
+    """Actualiza en su sitio bases de datos creadas por versiones anteriores; es idempotente."""
+    informe = {'columnas': [], 'indices': [], 'duplicados': []}
+    if db.engine.dialect.name != 'sqlite':
+        return informe
+    engines = [db.engine]
+    if current_app.config['MEAL_SHARDS']:
+        engines += engines_shard(db)
+    for engine in engines:
+        migrar_engine(engine, informe)
+
+    for columna in informe['columnas']:
+        logger.info('Columna añadida: %s', columna)
+    for indice in informe['indices']:
+        logger.info('Índice creado: %s', indice)
+    for email, ids in informe['duplicados']:
+        logger.error('Cuentas duplicadas para %s (ids %s): fusiónalas y ejecuta "python -m app.cli migrate" '
+                     'para crear el índice único', email, ', '.join(map(str, ids)))
+    return informe
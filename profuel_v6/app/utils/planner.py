@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from flask import current_app
+
+from app import db
+from app.models.user import Meal
+
+DIAS_HISTORIAL = 90
+MAX_CANDIDATOS = 15
+MAX_RACIONES = 4
+MAX_USUARIOS_CACHE = 10000
+# Tamaño de los cubos de macros restantes (kcal, proteínas, carbohidratos, grasas)
+CUBOS = (50, 5, 10, 5)
+# Escala de cada error: 100 kcal pesan lo mismo que 10 g de proteína, 20 g de carbohidratos o 10 g de grasa
+ESCALAS = (100, 10, 20, 10)
+PENALIZACION_EXCESO = 2
+
+Candidato = namedtuple('Candidato', 'name kcal protein carbs fat veces')
+
+def candidatos_frecuentes(user_id, hoy):
+    filas = (db.session.query(Meal.name, db.func.avg(Meal.kcal), db.func.avg(Meal.protein),
+                              db.func.avg(Meal.carbs), db.func.avg(Meal.fat), db.func.count())
+             .filter(Meal.user_id == user_id, Meal.deleted.is_(False),
+                     Meal.day_key >= (hoy - timedelta(days=DIAS_HISTORIAL)).toordinal())
+             .group_by(Meal.name)
+             .order_by(db.func.count().desc(), Meal.name)
+             .limit(MAX_CANDIDATOS)
+             .all())
+    return [Candidato(*fila) for fila in filas]
+
+def error(totales, objetivo):
+    total = 0.0
+    for valor, meta, escala in zip(totales, objetivo, ESCALAS):
+        d = (valor - meta) / escala
+        total += d * d * (PENALIZACION_EXCESO if d > 0 else 1)
+    return total
+
+def resolver(candidatos, objetivo):
+    # Búsqueda exhaustiva acotada: como mucho MAX_RACIONES raciones, combinaciones con repetición
+    macros = [(c.kcal, c.protein, c.carbs, c.fat) for c in candidatos]
+    mejor = [error((0, 0, 0, 0), objetivo), ()]
+
+    def buscar(inicio, elegidos, totales):
+        for i in range(inicio, len(macros)):
+            k, p, c, f = macros[i]
+            nuevos = (totales[0] + k, totales[1] + p, totales[2] + c, totales[3] + f)
+            # Solo el exceso de kcal ya iguala al mejor error: ni esta rama ni las que cuelgan de ella mejoran
+            if nuevos[0] > objetivo[0] and PENALIZACION_EXCESO * ((nuevos[0] - objetivo[0]) / ESCALAS[0]) ** 2 >= mejor[0]:
+                continue
+            seleccion = elegidos + (i,)
+            e = error(nuevos, objetivo)
+            if e < mejor[0]:
+                mejor[0], mejor[1] = e, seleccion
+            if len(seleccion) < MAX_RACIONES:
+                buscar(i, seleccion, nuevos)
+
+    buscar(0, (), (0, 0, 0, 0))
+    raciones = OrderedDict()
+    for i in mejor[1]:
+        raciones[candidatos[i]] = raciones.get(candidatos[i], 0) + 1
+    return list(raciones.items())
+
+def cubo(restantes):
+    return tuple(round(max(v, 0) / paso) for v, paso in zip(restantes, CUBOS))
+
+class PlannerCache:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.usuarios = OrderedDict()
+
+    def entrada(self, user_id, hoy):
+        with self.lock:
+            datos = self.usuarios.get(user_id)
+            if datos is None or datos['dia'] != hoy:
+                datos = {'dia': hoy, 'candidatos': None, 'planes': {}}
+                self.usuarios[user_id] = datos
+            self.usuarios.move_to_end(user_id)
+            while len(self.usuarios) > MAX_USUARIOS_CACHE:
+                self.usuarios.popitem(last=False)
+            return datos
+
+    def invalidar(self, user_id):
+        # Una comida nueva cambia lo que queda por cubrir, no qué come el usuario: los candidatos
+        # (90 días de historial) se conservan hasta el cambio de día y solo se descartan los planes
+        with self.lock:
+            datos = self.usuarios.get(user_id)
+            if datos is not None:
+                datos['planes'] = {}
+
+def planificar(user_id, hoy, restantes):
+    cache = current_app.extensions['planner']
+    datos = cache.entrada(user_id, hoy)
+    clave = cubo(restantes)
+    plan = datos['planes'].get(clave)
+    if plan is None:
+        if datos['candidatos'] is None:
+            datos['candidatos'] = candidatos_frecuentes(user_id, hoy)
+        objetivo = tuple(n * paso for n, paso in zip(clave, CUBOS))
+        plan = resolver(datos['candidatos'], objetivo)
+        datos['planes'][clave] = plan
+    return plan
+
+def invalidar_plan(user_id):
+    current_app.extensions['planner'].invalidar(user_id)
+
+def init_planner(app):
+    app.extensions['planner'] = PlannerCache()
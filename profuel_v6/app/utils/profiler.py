@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import request, session
+
+MAX_PROFUNDIDAD = 128
+MAX_MUESTRAS = 200000
+INTERVALO_MINIMO = 0.001
+
+CATEGORIAS = [
+    ('jinja', ('jinja2/', '.html')),
+    ('sqlalchemy', ('sqlalchemy/',)),
+    ('hashing', ('werkzeug/security.py', 'hashlib')),
+    ('calculos', ('app/utils/calculos.py',)),
+]
+
+def nombre_frame(frame):
+    code = frame.f_code
+    fichero = code.co_filename.replace(os.sep, '/')
+    corte = fichero.rfind('site-packages/')
+    if corte != -1:
+        fichero = fichero[corte + len('site-packages/'):]
+    return f'{code.co_name} ({fichero})'
+
+def pila_colapsada(frame):
+    pila = []
+    while frame is not None and len(pila) < MAX_PROFUNDIDAD:
+        pila.append(nombre_frame(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(pila))
+
+class SamplingProfiler:
+    # Apagado, el único coste por petición es comprobar que self.objetivo es None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.objetivo = None
+        self.hilos = set()
+        self.stacks = Counter()
+        self.muestras = 0
+        self.intervalo = 0.005
+        self.muestreador = None
+
+    def armar(self, endpoint=None, user_id=None, peticiones=10, intervalo=0.005):
+        with self.lock:
+            self.objetivo = {'endpoint': endpoint, 'user_id': str(user_id) if user_id else None,
+                             'restantes': peticiones}
+            self.intervalo = max(intervalo, INTERVALO_MINIMO)
+            self.stacks = Counter()
+            self.muestras = 0
+
+    def desarmar(self):
+        with self.lock:
+            self.objetivo = None
+
+    def coincide(self, endpoint, user_id):
+        objetivo = self.objetivo
+        if objetivo is None or objetivo['restantes'] <= 0:
+            return False
+        if objetivo['endpoint'] and objetivo['endpoint'] != endpoint:
+            return False
+        if objetivo['user_id'] and objetivo['user_id'] != user_id:
+            return False
+        return True
+
+    def empezar_peticion(self):
+        with self.lock:
+            objetivo = self.objetivo
+            if objetivo is None or objetivo['restantes'] <= 0:
+                return False
+            objetivo['restantes'] -= 1
+            self.hilos.add(threading.get_ident())
+            if self.muestreador is None:
+                self.muestreador = threading.Thread(target=self.muestrear, name='profiler', daemon=True)
+                self.muestreador.start()
+        return True
+
+    def terminar_peticion(self):
+        with self.lock:
+            self.hilos.discard(threading.get_ident())
+            if self.objetivo is not None and self.objetivo['restantes'] <= 0 and not self.hilos:
+                self.objetivo = None
+
+    def muestrear(self):
+        propio = threading.get_ident()
+        while True:
+            with self.lock:
+                hilos = [h for h in self.hilos if h != propio]
+                if not hilos or self.muestras >= MAX_MUESTRAS:
+                    self.muestreador = None
+                    return
+            frames = sys._current_frames()
+            pilas = [pila_colapsada(frames[ident]) for ident in hilos if ident in frames]
+            del frames
+            # armar() sustituye stacks y muestras bajo el lock: se actualizan igual para no perder ni mezclar muestras
+            with self.lock:
+                self.stacks.update(pilas)
+                self.muestras += len(pilas)
+                intervalo = self.intervalo
+            time.sleep(intervalo)
+
+    def colapsado(self):
+        with self.lock:
+            stacks = dict(self.stacks)
+        return ''.join(f'{pila} {n}\n' for pila, n in sorted(stacks.items()))
+
+    def speedscope(self):
+        with self.lock:
+            stacks = dict(self.stacks)
+        indices, frames, samples, weights = {}, [], [], []
+        ms = self.intervalo * 1000
+        for pila, n in stacks.items():
+            muestra = []
+            for nombre in pila.split(';'):
+                if nombre not in indices:
+                    indices[nombre] = len(frames)
+                    frames.append({'name': nombre})
+                muestra.append(indices[nombre])
+            samples.append(muestra)
+            weights.append(n * ms)
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': frames},
+            'profiles': [{'type': 'sampled', 'name': 'profuel', 'unit': 'milliseconds',
+                          'startValue': 0, 'endValue': sum(weights),
+                          'samples': samples, 'weights': weights}],
+        }
+
+    def resumen(self, top=20):
+        with self.lock:
+            stacks = dict(self.stacks)
+            total = self.muestras
+        propios = Counter()
+        categorias = Counter()
+        for pila, n in stacks.items():
+            frames = pila.split(';')
+            propios[frames[-1]] += n
+            for categoria, patrones in CATEGORIAS:
+                if any(p in f for f in frames for p in patrones):
+                    categorias[categoria] += n
+        return {
+            'activo': self.objetivo is not None,
+            'objetivo': self.objetivo,
+            'muestras': total,
+            'intervalo_ms': self.intervalo * 1000,
+            'top_frames': [{'frame': f, 'muestras': n, 'pct': round(100 * n / total, 1)}
+                           for f, n in propios.most_common(top)] if total else [],
+            'categorias': {c: round(100 * categorias[c] / total, 1) if total else 0.0
+                           for c, _ in CATEGORIAS},
+        }
+
+def init_profiler(app):
+    profiler = SamplingProfiler()
+    app.extensions['profiler'] = profiler
+
+    @app.before_request
+    def perfilar_peticion():
+        if profiler.objetivo is None:
+            return
+        if profiler.coincide(request.endpoint, session.get('_user_id')):
+            request.environ['profuel.perfilada'] = profiler.empezar_peticion()
+
+    @app.teardown_request
+    def terminar_perfilado(exc):
+        if request.environ.get('profuel.perfilada'):
+            profiler.terminar_peticion()
@@ -0,0 +1,152 @@
+import heapq
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from app import db
+from app.models.user import Profile, Meal
+from app.models.reminder import ReminderPreference, NotificationOutbox
+from app.utils.shards import en_shard_de, shard_para
+from app.utils.fechas import zona
+
+MENSAJE = 'Aún no has registrado ninguna comida hoy. ¿Qué has comido?'
+
+logger = logging.getLogger('profuel.reminders')
+
+class NotificationSink:
+    def send(self, avisos):
+        # avisos: lista de (user_id, mensaje)
+        raise NotImplementedError
+
+class LogSink(NotificationSink):
+    def send(self, avisos):
+        for user_id, mensaje in avisos:
+            logger.info('Recordatorio para el usuario %s: %s', user_id, mensaje)
+
+class OutboxSink(NotificationSink):
+    # Deja los avisos en notification_outbox para que otro proceso los entregue
+    def send(self, avisos):
+        if avisos:
+            db.session.execute(NotificationOutbox.__table__.insert(),
+                               [{'user_id': u, 'mensaje': m, 'created_at': datetime.utcnow()} for u, m in avisos])
+
+SINKS = {'log': LogSink, 'outbox': OutboxSink}
+
+def get_sink():
+    return SINKS[current_app.config['REMINDER_SINK']]()
+
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def hora_local(instante_utc, tz):
+    return instante_utc.replace(tzinfo=timezone.utc).astimezone(tz)
+
+def siguiente_disparo(hora, despues_de, tz):
+    # hora es la hora local del usuario; next_fire_at se guarda en UTC
+    local = hora_local(despues_de, tz)
+    candidato = datetime.combine(local.date(), hora, tzinfo=tz)
+    if candidato <= local:
+        candidato = datetime.combine(local.date() + timedelta(days=1), hora, tzinfo=tz)
+    return candidato.astimezone(timezone.utc).replace(tzinfo=None)
+
+def programar(pref, tz):
+    # updated_at avisa al scheduler, que corre en otro proceso, de que su ventana puede haber cambiado
+    ahora = utcnow()
+    pref.next_fire_at = siguiente_disparo(pref.hora, ahora, tz) if pref.enabled else None
+    pref.updated_at = ahora
+
+def zonas_de(user_ids):
+    filas = db.session.query(Profile.user_id, Profile.timezone).filter(Profile.user_id.in_(user_ids))
+    zonas = {user_id: zona(nombre) for user_id, nombre in filas}
+    por_defecto = zona(None)
+    return {user_id: zonas.get(user_id, por_defecto) for user_id in user_ids}
+
+def usuarios_con_comida(dia_por_usuario):
+    # dia_por_usuario: {user_id: day_key del día local de ese usuario}
+    n_shards = current_app.config['MEAL_SHARDS']
+    grupos = {}
+    for user_id in dia_por_usuario:
+        grupos.setdefault(shard_para(user_id, n_shards) if n_shards else 0, []).append(user_id)
+    claves = set(dia_por_usuario.values())
+    registrados = set()
+    # Una consulta por shard, no por usuario
+    for grupo in grupos.values():
+        with en_shard_de(grupo[0]):
+            filas = (db.session.query(Meal.user_id, Meal.day_key).distinct()
+                     .filter(Meal.user_id.in_(grupo), Meal.day_key.in_(claves), Meal.deleted.is_(False)))
+            registrados.update(u for u, clave in filas if dia_por_usuario[u] == clave)
+    return registrados
+
+class ReminderScheduler:
+    # Montículo en memoria con los recordatorios de la próxima ventana; la base de datos es la fuente de verdad.
+    # Cada tick hace como mucho max_por_tick disparos y, una vez por ventana, un recorrido acotado del índice.
+    # Un recordatorio creado o movido dentro de la ventana ya cargada fuerza una recarga en el tick siguiente.
+
+    def __init__(self, sink, ventana=timedelta(minutes=5), max_por_tick=1000, max_cargados=50000):
+        self.sink = sink
+        self.ventana = ventana
+        self.max_por_tick = max_por_tick
+        self.max_cargados = max_cargados
+        self.heap = []
+        self.recargar_en = None
+        self.incompleto = False
+        self.ultimo_cambio = None
+
+    def cambios(self):
+        # max() sobre un índice: una búsqueda, no un recorrido
+        return db.session.query(db.func.max(ReminderPreference.updated_at)).scalar()
+
+    def recargar(self, ahora, ultimo_cambio=None):
+        # El cambio se anota antes de cargar: lo que llegue entre medias provoca otra recarga, nunca se pierde
+        self.ultimo_cambio = ultimo_cambio
+        hasta = ahora + self.ventana
+        filas = (db.session.query(ReminderPreference.next_fire_at, ReminderPreference.user_id)
+                 .filter(ReminderPreference.enabled.is_(True), ReminderPreference.next_fire_at <= hasta)
+                 .order_by(ReminderPreference.next_fire_at)
+                 .limit(self.max_cargados)
+                 .all())
+        self.heap = [tuple(f) for f in filas]
+        heapq.heapify(self.heap)
+        self.recargar_en = hasta
+        # Si la ventana no cabía entera, se vuelve a cargar en cuanto se vacíe el montículo
+        self.incompleto = len(filas) >= self.max_cargados
+
+    def tick(self, ahora=None):
+        ahora = ahora or utcnow()
+        ultimo_cambio = self.cambios()
+        if (self.recargar_en is None or ahora >= self.recargar_en or (self.incompleto and not self.heap)
+                or ultimo_cambio != self.ultimo_cambio):
+            self.recargar(ahora, ultimo_cambio)
+
+        vencidos = []
+        while self.heap and self.heap[0][0] <= ahora and len(vencidos) < self.max_por_tick:
+            vencidos.append(heapq.heappop(self.heap)[1])
+        if not vencidos:
+            return 0
+
+        # Las preferencias pueden haber cambiado desde que se cargó el montículo
+        prefs = (ReminderPreference.query
+                 .filter(ReminderPreference.user_id.in_(vencidos), ReminderPreference.enabled.is_(True),
+                         ReminderPreference.next_fire_at <= ahora)
+                 .all())
+        zonas = zonas_de([p.user_id for p in prefs])
+        registrados = usuarios_con_comida({p.user_id: hora_local(ahora, zonas[p.user_id]).date().toordinal()
+                                           for p in prefs})
+        self.sink.send([(p.user_id, MENSAJE) for p in prefs if p.user_id not in registrados])
+        for p in prefs:
+            p.next_fire_at = siguiente_disparo(p.hora, ahora, zonas[p.user_id])
+        db.session.commit()
+        return len(prefs)
+
+    def ejecutar(self, intervalo=1.0):
+        while True:
+            inicio = time.monotonic()
+            try:
+                self.tick()
+            except Exception:
+                # Un fallo puntual (base de datos bloqueada, sink caído) no debe parar el scheduler
+                db.session.rollback()
+                logger.exception('Fallo en el tick de recordatorios; se reintenta en el siguiente')
+            time.sleep(max(intervalo - (time.monotonic() - inicio), 0))
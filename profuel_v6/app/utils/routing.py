@@ -0,0 +1,75 @@
+import time
+from functools import wraps
+
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, session as sesion_web
+from flask_sqlalchemy.session import Session
+
+REPLICA = 'replica'
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            tabla = tabla_de(mapper, clause)
+            if current_app.config.get('MEAL_SHARDS'):
+                from app.utils.shards import TABLAS_SHARD, engine_enrutado
+                if tabla in TABLAS_SHARD:
+                    return engine_enrutado(self._db)
+            if self.usar_replica(clause):
+                return self._db.engines[REPLICA]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def usar_replica(self, clause):
+        if REPLICA not in self._db.engines or self._flushing:
+            return False
+        if isinstance(clause, sa.sql.dml.UpdateBase):
+            return False
+        if not has_request_context() or not g.get('lectura_replica'):
+            return False
+        # Lee-tus-escrituras: tras un commit el usuario lee del primario durante REPLICA_PIN_SECONDS
+        return sesion_web.get('_primario_hasta', 0) < time.time()
+
+def tabla_de(mapper, clause):
+    if mapper is not None:
+        return sa.inspect(mapper).local_table.name
+    table = getattr(clause, 'table', None)
+    return getattr(table, 'name', None)
+
+def lectura_en_replica(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.lectura_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def marcar_escritura(sess, flush_context):
+    sess.info['escribio'] = True
+
+@sa.event.listens_for(RoutingSession, 'after_rollback')
+def descartar_escritura(sess):
+    sess.info.pop('escribio', None)
+
+@sa.event.listens_for(RoutingSession, 'after_commit')
+def fijar_primario(sess):
+    if sess.info.pop('escribio', False) and has_request_context() and current_app.config.get('REPLICA_DATABASE_URI'):
+        sesion_web['_primario_hasta'] = time.time() + current_app.config['REPLICA_PIN_SECONDS']
+
+def configurar_replica(app):
+    uri = app.config.get('REPLICA_DATABASE_URI')
+    if not uri:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds[REPLICA] = uri
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+def activar_wal(db):
+    # Con una réplica SQLite de solo lectura sobre el mismo fichero, WAL evita que lectores y escritor se bloqueen
+    if not current_app.config.get('REPLICA_DATABASE_URI') or db.engine.dialect.name != 'sqlite':
+        return
+
+    @sa.event.listens_for(db.engine, 'connect')
+    def pragma_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.close()
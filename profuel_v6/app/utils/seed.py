@@ -0,0 +1,142 @@
+import math
+import random
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+from flask import current_app
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models.user import User
+from app.utils.calculos import calcular_kcal
+from app.utils.shards import engines_shard, shard_para
+
+LOTE = 10000
+PASSWORD = 'profuel'
+
+ACTIVIDADES = [1.2, 1.375, 1.55, 1.725, 1.9]
+PESOS_ACTIVIDAD = [30, 30, 25, 10, 5]
+ZONAS = ['Europe/Madrid', 'Atlantic/Canary', 'America/Mexico_City', 'America/Bogota', 'America/Argentina/Buenos_Aires']
+PESOS_ZONA = [60, 5, 15, 10, 10]
+
+# (franja, hora media, probabilidad de registrarla, fracción de las kcal del día, nombres)
+FRANJAS = [
+    ('desayuno', 8, 0.85, 0.25, ['Avena con leche', 'Tostadas con huevo', 'Yogur con fruta', 'Café con bollería']),
+    ('almuerzo', 14, 0.95, 0.40, ['Pollo con arroz', 'Lentejas', 'Pasta boloñesa', 'Ensalada de atún', 'Paella']),
+    ('merienda', 18, 0.45, 0.10, ['Fruta', 'Frutos secos', 'Batido de proteínas', 'Bocadillo']),
+    ('cena', 21, 0.90, 0.25, ['Salmón con verduras', 'Tortilla de patatas', 'Pizza', 'Crema de calabaza']),
+]
+
+# Las filas se generan ya serializadas en el formato con el que SQLAlchemy guarda
+# fechas en SQLite y se insertan con executemany del driver, sin procesado por fila
+COLUMNAS_MEAL = ('user_id', 'name', 'date', 'day_key', 'protein', 'carbs', 'fat', 'kcal', 'client_id', 'updated_at', 'deleted')
+COLUMNAS_PROFILE = ('user_id', 'sexo', 'altura', 'peso', 'fecha_nacimiento', 'actividad', 'timezone', 'updated_at')
+COLUMNAS_USER = ('id', 'email', 'email_normalized', 'password')
+
+class Seeder:
+    def __init__(self, seed, hasta=None):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.hasta = hasta or date.today()
+
+    def uuid(self):
+        h = '%032x' % self.rng.getrandbits(128)
+        return f'{h[:8]}-{h[8:12]}-4{h[13:16]}-{h[16:20]}-{h[20:]}'
+
+    def perfil(self, user_id):
+        rng = self.rng
+        sexo = rng.choice(['M', 'F'])
+        altura = rng.gauss(176, 7) if sexo == 'M' else rng.gauss(163, 6)
+        imc = min(max(rng.gauss(25, 4), 17), 42)
+        edad = rng.randint(18, 75)
+        nacimiento = self.hasta - timedelta(days=edad * 365 + rng.randint(0, 364))
+        return (user_id, sexo, round(altura, 1), round(imc * (altura / 100) ** 2, 1),
+                nacimiento.isoformat(), rng.choices(ACTIVIDADES, PESOS_ACTIVIDAD)[0], rng.choices(ZONAS, PESOS_ZONA)[0],
+                f'{self.hasta.isoformat()} 00:00:00.000000')
+
+    def comidas(self, perfil, dias):
+        # Bucle caliente: se evitan llamadas a uniform/gauss/choice/round por fila
+        rng = self.rng
+        random_ = rng.random
+        user_id, peso, actividad = perfil[0], perfil[3], perfil[5]
+        kcal_dia = (22 * peso) * actividad
+        # Cada usuario tiene su propia constancia: unos registran casi todo, otros a rachas
+        constancia = rng.betavariate(4, 2)
+        inicio = self.hasta - timedelta(days=dias - 1)
+        for d in range(dias):
+            if random_() > constancia:
+                continue
+            dia = inicio + timedelta(days=d)
+            dia_iso = dia.isoformat()
+            dia_key = dia.toordinal()
+            factor_dia = kcal_dia * (1.15 if dia.weekday() >= 5 else 1.0)
+            for franja, hora, prob, fraccion, nombres in FRANJAS:
+                if random_() > prob:
+                    continue
+                kcal = factor_dia * fraccion * (0.7 + 0.6 * random_())
+                protein = int(kcal * (0.15 + 0.15 * random_()) * 2.5 + 0.5) / 10
+                fat = int(kcal * (0.20 + 0.15 * random_()) * 10 / 9 + 0.5) / 10
+                carbs = max(int((kcal - protein * 4 - fat * 9) * 2.5 + 0.5), 0) / 10
+                # Hora alrededor de la habitual de la franja (distribución triangular, ±90 min)
+                minuto = hora * 60 + int((random_() + random_() - 1) * 90)
+                yield (user_id, nombres[int(random_() * len(nombres))], dia_iso, dia_key, protein, carbs, fat,
+                       calcular_kcal(protein, carbs, fat), self.uuid(),
+                       f'{dia_iso} {minuto // 60:02d}:{minuto % 60:02d}:00.000000', 0)
+
+def sql_insert(tabla, columnas):
+    return f'INSERT INTO {tabla} ({", ".join(columnas)}) VALUES ({", ".join("?" * len(columnas))})'
+
+def insertar_por_lotes(tabla, columnas, filas):
+    sql = sql_insert(tabla, columnas)
+    conexion = db.session.connection()
+    total = 0
+    while True:
+        lote = list(islice(filas, LOTE))
+        if not lote:
+            return total
+        conexion.exec_driver_sql(sql, lote)
+        total += len(lote)
+
+def insertar_meals(filas):
+    # Las filas se generan siempre en el mismo orden y se reparten por shard (user_id es la columna 0),
+    # así los datos no dependen del número de shards
+    n_shards = current_app.config['MEAL_SHARDS']
+    if not n_shards:
+        return insertar_por_lotes('meal', COLUMNAS_MEAL, filas)
+    sql = sql_insert('meal', COLUMNAS_MEAL)
+    conexiones = [db.session.connection(bind_arguments={'bind': e}) for e in engines_shard(db)]
+    lotes = [[] for _ in conexiones]
+    total = 0
+    for fila in filas:
+        i = shard_para(fila[0], n_shards)
+        lotes[i].append(fila)
+        if len(lotes[i]) >= LOTE:
+            conexiones[i].exec_driver_sql(sql, lotes[i])
+            total += len(lotes[i])
+            lotes[i] = []
+    for conexion, lote in zip(conexiones, lotes):
+        if lote:
+            conexion.exec_driver_sql(sql, lote)
+            total += len(lote)
+    return total
+
+def generar_poblacion(usuarios, dias, seed, hasta=None):
+    seeder = Seeder(seed, hasta)
+    primer_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    # Un único hash para todos: el coste de scrypt no debe dominar la generación
+    password = generate_password_hash(PASSWORD)
+
+    inicio = time.perf_counter()
+    ids = range(primer_id, primer_id + usuarios)
+    emails = ((i, f'sim{seed}-{i}@profuel.test') for i in ids)
+    insertar_por_lotes('user', COLUMNAS_USER, ((i, email, email, password) for i, email in emails))
+    perfiles = [seeder.perfil(i) for i in ids]
+    insertar_por_lotes('profile', COLUMNAS_PROFILE, iter(perfiles))
+    n_meals = insertar_meals(meal for perfil in perfiles for meal in seeder.comidas(perfil, dias))
+    db.session.commit()
+    segundos = time.perf_counter() - inicio
+
+    filas = 2 * usuarios + n_meals
+    return {'usuarios': usuarios, 'comidas': n_meals, 'segundos': segundos,
+            'filas_por_segundo': math.floor(filas / segundos) if segundos else filas}
@@ -0,0 +1,145 @@
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import sqlalchemy as sa
+from flask import current_app, has_request_context
+
+# Tablas con datos por usuario que viven en el shard del usuario cuando MEAL_SHARDS > 0
+TABLAS_SHARD = ('meal', 'change_log', 'attachment')
+
+_usuario_shard = ContextVar('usuario_shard', default=None)
+
+def jump_hash(key, buckets):
+    # Jump consistent hash (Lamping y Veach): al pasar de N a N+1 shards solo se mueve 1/(N+1) de los usuarios
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * (float(1 << 31) / float((key >> 33) + 1)))
+    return b
+
+def shard_para(user_id, n_shards):
+    return jump_hash(int(user_id), n_shards)
+
+def bind_key(indice):
+    return f'meals_{indice}'
+
+def configurar_binds(app):
+    n = app.config['MEAL_SHARDS']
+    if not n:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for i in range(n):
+        # El timeout amplio absorbe las esperas por el cerrojo de escritura de SQLite
+        binds[bind_key(i)] = {'url': app.config['MEAL_SHARD_URI'].format(i),
+                              'connect_args': {'timeout': 30}}
+    app.config['SQLALCHEMY_BINDS'] = binds
+
+@contextmanager
+def en_shard_de(user_id):
+    token = _usuario_shard.set(user_id)
+    try:
+        yield
+    finally:
+        _usuario_shard.reset(token)
+
+def usuario_enrutado():
+    user_id = _usuario_shard.get()
+    if user_id is None and has_request_context():
+        from flask_login import current_user
+        if current_user.is_authenticated:
+            user_id = current_user.id
+    return user_id
+
+def engines_shard(db):
+    return [db.engines[bind_key(i)] for i in range(current_app.config['MEAL_SHARDS'])]
+
+def engine_para(db, user_id):
+    return db.engines[bind_key(shard_para(user_id, current_app.config['MEAL_SHARDS']))]
+
+def engine_enrutado(db):
+    user_id = usuario_enrutado()
+    if user_id is None:
+        raise RuntimeError('Acceso a una tabla por usuario sin usuario: usa en_shard_de(user_id).')
+    return engine_para(db, user_id)
+
+def crear_tablas(db):
+    if not current_app.config['MEAL_SHARDS']:
+        # Solo la metadata por defecto: init_app registra una por bind y queda en `db` aunque esta app no la tenga
+        db.create_all(bind_key=None)
+        return
+    tablas_shard = [t for t in db.metadata.sorted_tables if t.name in TABLAS_SHARD]
+    tablas_globales = [t for t in db.metadata.sorted_tables if t.name not in TABLAS_SHARD]
+    db.metadata.create_all(db.engine, tables=tablas_globales)
+    for engine in engines_shard(db):
+        db.metadata.create_all(engine, tables=tablas_shard)
+
+def engine_origen(db, n_shards, indice):
+    if indice < n_shards:
+        return db.engines[bind_key(indice)]
+    # Shards que ya no están en la configuración: se abren solo para vaciarlos
+    url = sa.engine.make_url(current_app.config['MEAL_SHARD_URI'].format(indice))
+    if url.drivername.startswith('sqlite') and url.database and not os.path.isabs(url.database):
+        url = url.set(database=os.path.join(current_app.instance_path, url.database))
+    return sa.create_engine(url)
+
+def usuarios_en(conexion, tablas):
+    consulta = sa.union(*(sa.select(t.c.user_id) for t in tablas))
+    return sorted(conexion.execute(consulta).scalars())
+
+def mover_usuario(origen, destino, user_id, tablas):
+    meal, change_log, attachment = tablas
+    with origen.connect() as src:
+        meals = [dict(r) for r in src.execute(sa.select(meal).where(meal.c.user_id == user_id)).mappings()]
+        cambios = [dict(r) for r in src.execute(sa.select(change_log).where(change_log.c.user_id == user_id)
+                                                .order_by(change_log.c.id)).mappings()]
+        adjuntos = [dict(r) for r in src.execute(sa.select(attachment).where(attachment.c.user_id == user_id)).mappings()]
+
+    with destino.begin() as dst:
+        # Restos de una ejecución interrumpida: el origen sigue siendo la copia buena
+        for t in (attachment, change_log, meal):
+            dst.execute(t.delete().where(t.c.user_id == user_id))
+
+        base = dst.execute(sa.select(sa.func.max(meal.c.id))).scalar() or 0
+        ids = {m['id']: base + k + 1 for k, m in enumerate(meals)}
+        if meals:
+            dst.execute(meal.insert(), [{**m, 'id': ids[m['id']]} for m in meals])
+        if adjuntos:
+            dst.execute(attachment.insert(), [{**a, 'id': None, 'meal_id': ids[a['meal_id']]} for a in adjuntos])
+        if cambios:
+            # Los tokens de sync que tenga el cliente deben seguir siendo menores que las nuevas secuencias
+            maximo = cambios[-1]['id']
+            seq = dst.execute(sa.text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")).scalar()
+            if seq is None:
+                dst.execute(sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES ('change_log', :m)"), {'m': maximo})
+            elif seq < maximo:
+                dst.execute(sa.text("UPDATE sqlite_sequence SET seq = :m WHERE name = 'change_log'"), {'m': maximo})
+            dst.execute(change_log.insert(), [{**c, 'id': None} for c in cambios])
+
+    with origen.begin() as src:
+        for t in (attachment, change_log, meal):
+            src.execute(t.delete().where(t.c.user_id == user_id))
+    return len(meals) + len(cambios) + len(adjuntos)
+
+def rebalancear(db, desde):
+    # Mueve los datos por usuario de `desde` shards (0 = base de datos global) a MEAL_SHARDS.
+    # Debe ejecutarse con la aplicación parada.
+    n_shards = current_app.config['MEAL_SHARDS']
+    tablas = [db.metadata.tables[t] for t in TABLAS_SHARD]
+    if desde:
+        origenes = [engine_origen(db, n_shards, i) for i in range(desde)]
+    else:
+        origenes = [db.engine]
+
+    movidos, filas = 0, 0
+    for origen in origenes:
+        with origen.connect() as conexion:
+            usuarios = usuarios_en(conexion, tablas)
+        for user_id in usuarios:
+            destino = engine_para(db, user_id) if n_shards else db.engine
+            if destino.url == origen.url:
+                continue
+            filas += mover_usuario(origen, destino, user_id, tablas)
+            movidos += 1
+    return {'usuarios': movidos, 'filas': filas}
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+
+from flask import current_app, send_file
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CHUNK = 64 * 1024
+UN_ANIO = 365 * 24 * 3600
+# Solo formatos raster: el tipo se deduce del contenido y nunca del que declara el cliente (un SVG puede llevar scripts)
+FORMATOS_IMAGEN = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'GIF': 'image/gif', 'WEBP': 'image/webp'}
+
+class AttachmentStore(ABC):
+    # Interfaz mínima para un almacén direccionado por contenido (clave = SHA-256)
+
+    @abstractmethod
+    def save(self, stream):
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_bytes(self, key, data):
+        raise NotImplementedError
+
+    @abstractmethod
+    def exists(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, key):
+        raise NotImplementedError
+
+    @abstractmethod
+    def send(self, key, mimetype):
+        raise NotImplementedError
+
+class LocalAttachmentStore(AttachmentStore):
+    def __init__(self, root):
+        self.root = root
+        self.tmp = os.path.join(root, 'tmp')
+        os.makedirs(self.tmp, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def save(self, stream):
+        # Se escribe a disco por bloques mientras se calcula el hash; nunca se carga entero en memoria
+        sha = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    bloque = stream.read(CHUNK)
+                    if not bloque:
+                        break
+                    sha.update(bloque)
+                    f.write(bloque)
+                    size += len(bloque)
+            key = sha.hexdigest()
+            if self.exists(key):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+                os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key, size
+
+    def save_bytes(self, key, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.makedirs(os.path.dirname(self.path(key)), exist_ok=True)
+        os.replace(tmp_path, self.path(key))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def send(self, key, mimetype):
+        # send_file atiende peticiones Range y condicionales; el contenido nunca cambia
+        resp = send_file(self.path(key), mimetype=mimetype, conditional=True, etag=key)
+        resp.headers['Cache-Control'] = f'private, max-age={UN_ANIO}, immutable'
+        resp.headers['X-Content-Type-Options'] = 'nosniff'
+        return resp
+
+def init_storage(app):
+    root = app.config.get('ATTACHMENT_ROOT') or os.path.join(app.instance_path, 'attachments')
+    app.extensions['attachment_store'] = LocalAttachmentStore(root)
+
+def get_store():
+    return current_app.extensions['attachment_store']
+
+def tipo_imagen(stream):
+    # Pillow solo lee la cabecera; devuelve el mimetype real o None si no es un formato permitido
+    if Image is None:
+        return None
+    posicion = stream.tell()
+    try:
+        with Image.open(stream, formats=list(FORMATOS_IMAGEN)) as imagen:
+            return FORMATOS_IMAGEN.get(imagen.format)
+    except (OSError, ValueError):
+        return None
+    finally:
+        stream.seek(posicion)
+
+def guardar_adjunto(meal, fichero, content_type):
+    from app import db
+    from app.models.attachment import Attachment
+    from app.utils.thumbnails import thumbnail_key
+
+    key, size = get_store().save(fichero.stream)
+    attachment = Attachment(user_id=meal.user_id, meal_id=meal.id, sha256=key,
+                            filename=secure_filename(fichero.filename or '') or key,
+                            content_type=content_type, size=size,
+                            has_thumbnail=get_store().exists(thumbnail_key(key)))
+    db.session.add(attachment)
+    return attachment
+
+def encolar_thumbnail(attachment):
+    if not attachment.has_thumbnail:
+        current_app.extensions['thumbnail_worker'].submit(attachment.id, attachment.user_id)
@@ -0,0 +1,191 @@
+import math
+from datetime import date, datetime, timezone
+
+from app import db
+from app.models.user import Profile, Meal
+from app.models.sync import ChangeLog
+from app.utils.calculos import calcular_kcal
+from app.utils.fechas import zonas_validas
+
+CAMPOS_PERFIL = ('sexo', 'altura', 'peso', 'fecha_nacimiento', 'actividad', 'timezone')
+# Sin ellos el dashboard y el planificador no pueden calcular edad ni BMR
+CAMPOS_PERFIL_OBLIGATORIOS = ('sexo', 'altura', 'peso', 'fecha_nacimiento')
+
+def registrar_cambio(user_id, entity, entity_id):
+    # Solo interesa el último cambio de cada entidad: el log queda compactado
+    ChangeLog.query.filter_by(user_id=user_id, entity=entity, entity_id=entity_id).delete()
+    db.session.add(ChangeLog(user_id=user_id, entity=entity, entity_id=entity_id))
+
+def ultimo_token(user_id):
+    token = db.session.query(db.func.max(ChangeLog.id)).filter_by(user_id=user_id).scalar()
+    if token is None:
+        # Usuario sin cambios registrados (datos previos al log o generados con seed): la secuencia
+        # global también sirve, porque cualquier cambio futuro suyo tendrá un id mayor
+        token = db.session.query(db.func.max(ChangeLog.id)).scalar()
+    return token or 0
+
+def parse_timestamp(valor):
+    if not isinstance(valor, str):
+        raise ValueError('updated_at debe ser una fecha ISO 8601')
+    ts = datetime.fromisoformat(valor)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+def formato_timestamp(ts):
+    return ts.isoformat() + 'Z'
+
+def texto(item, campo, maximo):
+    valor = item.get(campo)
+    if not isinstance(valor, str) or not valor.strip() or len(valor) > maximo:
+        raise ValueError(f'{campo} debe ser un texto no vacío de como mucho {maximo} caracteres')
+    return valor.strip()
+
+def numero(item, campo, positivo=False):
+    valor = item.get(campo)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise ValueError(f'{campo} debe ser un número')
+    valor = float(valor)
+    if not math.isfinite(valor) or valor < 0 or (positivo and valor == 0):
+        raise ValueError(f'{campo} debe ser un número finito {"positivo" if positivo else "no negativo"}')
+    return valor
+
+def fecha(item, campo):
+    valor = item.get(campo)
+    if not isinstance(valor, str):
+        raise ValueError(f'{campo} debe ser una fecha AAAA-MM-DD')
+    return date.fromisoformat(valor)
+
+def validar_meal(item):
+    if not isinstance(item, dict):
+        raise ValueError('cada comida debe ser un objeto')
+    limpio = {'client_id': texto(item, 'client_id', 36),
+              'updated_at': parse_timestamp(item.get('updated_at')),
+              'deleted': bool(item.get('deleted'))}
+    if not limpio['deleted']:
+        limpio['name'] = texto(item, 'name', 150)
+        limpio['date'] = fecha(item, 'date')
+        for campo in ('protein', 'carbs', 'fat'):
+            limpio[campo] = numero(item, campo)
+    return limpio
+
+def validar_perfil(item, nuevo=False):
+    if not isinstance(item, dict):
+        raise ValueError('profile debe ser un objeto')
+    faltan = [campo for campo in CAMPOS_PERFIL_OBLIGATORIOS if nuevo and item.get(campo) is None]
+    if faltan:
+        raise ValueError(f'un perfil nuevo necesita {", ".join(faltan)}')
+    limpio = {'updated_at': parse_timestamp(item.get('updated_at'))}
+    if 'sexo' in item:
+        if item['sexo'] not in ('M', 'F'):
+            raise ValueError("sexo debe ser 'M' o 'F'")
+        limpio['sexo'] = item['sexo']
+    for campo in ('altura', 'peso', 'actividad'):
+        if campo in item:
+            limpio[campo] = numero(item, campo, positivo=True)
+    if 'fecha_nacimiento' in item:
+        limpio['fecha_nacimiento'] = fecha(item, 'fecha_nacimiento')
+    if 'timezone' in item:
+        if item['timezone'] not in zonas_validas():
+            raise ValueError('timezone debe ser una zona IANA, p. ej. Europe/Madrid')
+        limpio['timezone'] = item['timezone']
+    return limpio
+
+def meal_a_dict(meal):
+    return {
+        'client_id': meal.client_id,
+        'name': meal.name,
+        'date': meal.date.isoformat(),
+        'protein': meal.protein,
+        'carbs': meal.carbs,
+        'fat': meal.fat,
+        'kcal': meal.kcal,
+        'updated_at': formato_timestamp(meal.updated_at),
+        'deleted': meal.deleted,
+    }
+
+def perfil_a_dict(profile):
+    return {
+        'sexo': profile.sexo,
+        'altura': profile.altura,
+        'peso': profile.peso,
+        'fecha_nacimiento': profile.fecha_nacimiento.isoformat() if profile.fecha_nacimiento else None,
+        'actividad': profile.actividad,
+        'timezone': profile.timezone,
+        'updated_at': formato_timestamp(profile.updated_at),
+    }
+
+def aplicar_meals(user_id, items):
+    # Last-writer-wins por updated_at; devuelve (aceptados, rechazados) por client_id.
+    # Todo el lote se valida antes de escribir nada: un elemento inválido rechaza el lote entero
+    if not isinstance(items, list):
+        raise ValueError('meals debe ser una lista')
+    items = [validar_meal(item) for item in items]
+    client_ids = [item['client_id'] for item in items]
+    existentes = {m.client_id: m for m in
+                  Meal.query.filter(Meal.user_id == user_id, Meal.client_id.in_(client_ids))}
+    aceptados, rechazados = set(), set()
+
+    for item in items:
+        client_id = item['client_id']
+        updated_at = item['updated_at']
+        meal = existentes.get(client_id)
+        if meal is not None and meal.updated_at >= updated_at:
+            rechazados.add(client_id)
+            continue
+        if meal is None:
+            if item['deleted']:
+                continue
+            meal = Meal(user_id=user_id, client_id=client_id)
+            existentes[client_id] = meal
+            db.session.add(meal)
+
+        meal.deleted = item['deleted']
+        if not meal.deleted:
+            meal.name = item['name']
+            meal.date = item['date']
+            meal.protein = item['protein']
+            meal.carbs = item['carbs']
+            meal.fat = item['fat']
+            meal.kcal = calcular_kcal(meal.protein, meal.carbs, meal.fat)
+        meal.updated_at = updated_at
+        registrar_cambio(user_id, 'meal', client_id)
+        aceptados.add(client_id)
+
+    return aceptados, rechazados
+
+def aplicar_perfil(user_id, item):
+    profile = Profile.query.filter_by(user_id=user_id).first()
+    item = validar_perfil(item, nuevo=profile is None)
+    updated_at = item['updated_at']
+    if profile is not None and profile.updated_at >= updated_at:
+        return False
+    if profile is None:
+        profile = Profile(user_id=user_id)
+        db.session.add(profile)
+
+    for campo in CAMPOS_PERFIL:
+        if campo in item:
+            setattr(profile, campo, item[campo])
+    profile.updated_at = updated_at
+    registrar_cambio(user_id, 'profile', 'profile')
+    return True
+
+def cambios_desde(user_id, token, aceptados=(), rechazados=(), perfil_aceptado=False):
+    # Lo aceptado en este lote ya lo tiene el cliente; lo rechazado se le devuelve siempre
+    if token:
+        cambios = ChangeLog.query.filter(ChangeLog.user_id == user_id, ChangeLog.id > token).all()
+        meal_ids = {c.entity_id for c in cambios if c.entity == 'meal'}
+        meal_ids = (meal_ids - set(aceptados)) | set(rechazados)
+        query = Meal.query.filter(Meal.user_id == user_id, Meal.client_id.in_(meal_ids)) if meal_ids else None
+        incluir_perfil = any(c.entity == 'profile' for c in cambios)
+    else:
+        # Primera sincronización: estado completo, sin lápidas
+        query = Meal.query.filter(Meal.user_id == user_id, Meal.deleted.is_(False))
+        incluir_perfil = True
+
+    meals = [meal_a_dict(m) for m in query] if query is not None else []
+    profile = None
+    if incluir_perfil and not perfil_aceptado:
+        profile = Profile.query.filter_by(user_id=user_id).first()
+    return meals, perfil_a_dict(profile) if profile else None
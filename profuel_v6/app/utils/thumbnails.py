@@ -0,0 +1,53 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from app import db
+from app.utils.shards import en_shard_de
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+TAMANO = (256, 256)
+
+def thumbnail_key(key):
+    return f'{key}.thumb.jpg'
+
+def generar_thumbnail(store, key):
+    with store.open(key) as f:
+        imagen = Image.open(f)
+        imagen.thumbnail(TAMANO)
+        salida = io.BytesIO()
+        imagen.convert('RGB').save(salida, 'JPEG', quality=80)
+    store.save_bytes(thumbnail_key(key), salida.getvalue())
+
+class ThumbnailWorker:
+    def __init__(self, app, workers):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnails')
+
+    def submit(self, attachment_id, user_id):
+        if Image is None:
+            return None
+        return self.executor.submit(self.procesar, attachment_id, user_id)
+
+    def procesar(self, attachment_id, user_id):
+        from app.models.attachment import Attachment
+
+        with self.app.app_context(), en_shard_de(user_id):
+            attachment = db.session.get(Attachment, attachment_id)
+            if attachment is None or attachment.has_thumbnail:
+                return
+            store = self.app.extensions['attachment_store']
+            try:
+                if not store.exists(thumbnail_key(attachment.sha256)):
+                    generar_thumbnail(store, attachment.sha256)
+            except Exception:
+                self.app.logger.exception('No se pudo generar la miniatura de %s', attachment.sha256)
+                return
+            attachment.has_thumbnail = True
+            db.session.commit()
+
+def init_thumbnails(app):
+    app.extensions['thumbnail_worker'] = ThumbnailWorker(app, app.config.get('THUMBNAIL_WORKERS', 2))
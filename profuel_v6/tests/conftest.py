@@ -0,0 +1,22 @@
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'WTF_CSRF_ENABLED': False,
+        'ATTACHMENT_ROOT': str(tmp_path / 'attachments'),
+    })
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    client.post('/register', data={'email': 'ana@example.com', 'password': 'secreto'})
+    client.post('/login', data={'email': 'ana@example.com', 'password': 'secreto'})
+    return client
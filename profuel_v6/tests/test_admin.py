@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def admin(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'WTF_CSRF_ENABLED': False,
+                      'ATTACHMENT_ROOT': str(tmp_path / 'attachments'), 'ADMIN_EMAILS': ['admin@example.com']})
+    client = app.test_client()
+    client.post('/register', data={'email': 'admin@example.com', 'password': 'secreto'})
+    client.post('/login', data={'email': 'admin@example.com', 'password': 'secreto'})
+    return client
+
+
+def test_top_invalido_usa_el_valor_por_defecto(admin):
+    assert admin.get('/admin/profiler?top=abc').status_code == 200
+
+
+def test_start_y_stop_solo_aceptan_json(admin):
+    assert admin.post('/admin/profiler/start', data={'requests': '5'}).status_code == 415
+    assert admin.post('/admin/profiler/stop').status_code == 415
+    assert admin.post('/admin/profiler/start', json={'requests': 5}).status_code == 200
+    assert admin.post('/admin/profiler/stop', json={}).status_code == 200
+
+
+@pytest.fixture
+def perfilada(tmp_path):
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'WTF_CSRF_ENABLED': False,
+                      'ATTACHMENT_ROOT': str(tmp_path / 'attachments')})
+
+    def vista_lenta():
+        fin = time.monotonic() + 0.05
+        while time.monotonic() < fin:
+            pass
+        return 'ok'
+
+    def otra_vista_lenta():
+        return vista_lenta()
+
+    app.add_url_rule('/lenta', 'lenta', vista_lenta)
+    app.add_url_rule('/otra', 'otra', otra_vista_lenta)
+    return app
+
+
+def test_armar_captura_solo_el_endpoint_elegido(perfilada):
+    profiler = perfilada.extensions['profiler']
+    client = perfilada.test_client()
+    profiler.armar(endpoint='lenta', peticiones=1, intervalo=0.001)
+
+    client.get('/otra')
+    assert profiler.resumen()['muestras'] == 0
+
+    client.get('/lenta')
+    assert profiler.resumen()['muestras'] > 0
+    assert 'vista_lenta' in profiler.colapsado()
+    assert 'otra_vista_lenta' not in profiler.colapsado()
+    # Agotadas las peticiones pedidas, se desarma solo
+    assert profiler.resumen()['activo'] is False
+
+
+def test_armar_filtra_por_usuario(perfilada):
+    profiler = perfilada.extensions['profiler']
+    client = perfilada.test_client()
+    client.post('/register', data={'email': 'ana@example.com', 'password': 'secreto'})
+    client.post('/login', data={'email': 'ana@example.com', 'password': 'secreto'})
+
+    profiler.armar(user_id=999, intervalo=0.001)
+    client.get('/lenta')
+    assert profiler.resumen()['muestras'] == 0
+
+    profiler.armar(user_id=1, peticiones=1, intervalo=0.001)
+    client.get('/lenta')
+    assert profiler.resumen()['muestras'] > 0
@@ -0,0 +1,56 @@
+import gzip
+
+import pytest
+from flask import url_for
+
+CSS = 'css/style.css'
+
+
+def version(app):
+    return app.extensions['assets'].hashes[CSS]
+
+
+def test_url_for_anade_la_huella(app):
+    with app.test_request_context():
+        assert url_for('static', filename=CSS) == f'/static/{CSS}?v={version(app)}'
+
+
+def test_huella_correcta_es_inmutable_y_otra_no_cache(app):
+    client = app.test_client()
+    resp = client.get(f'/static/{CSS}?v={version(app)}')
+    assert resp.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert client.get(f'/static/{CSS}?v=antigua').headers['Cache-Control'] == 'no-cache'
+    assert client.get(f'/static/{CSS}').headers['Cache-Control'] == 'no-cache'
+    assert client.get('/static/no-existe.css').status_code == 404
+
+
+def test_negociacion_de_encoding(app):
+    client = app.test_client()
+    original = open(f'{app.static_folder}/{CSS}', 'rb').read()
+
+    identidad = client.get(f'/static/{CSS}')
+    assert 'Content-Encoding' not in identidad.headers
+    assert identidad.data == original
+    assert 'Accept-Encoding' in identidad.headers['Vary']
+
+    comprimida = client.get(f'/static/{CSS}', headers={'Accept-Encoding': 'gzip'})
+    assert comprimida.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(comprimida.data) == original
+
+    brotli = pytest.importorskip('brotli')
+    preferida = client.get(f'/static/{CSS}', headers={'Accept-Encoding': 'gzip, br'})
+    assert preferida.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(preferida.data) == original
+
+
+def test_etag_coincidente_devuelve_304(app):
+    client = app.test_client()
+    primera = client.get(f'/static/{CSS}', headers={'Accept-Encoding': 'gzip'})
+    etag = primera.headers['ETag']
+    assert etag == f'"{version(app)}-gzip"'
+
+    segunda = client.get(f'/static/{CSS}', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert segunda.status_code == 304
+    assert segunda.data == b''
+    # La ETag es por encoding: la de gzip no vale para la respuesta sin comprimir
+    assert client.get(f'/static/{CSS}', headers={'If-None-Match': etag}).status_code == 200
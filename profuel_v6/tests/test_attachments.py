@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from app.models.attachment import Attachment
+from app.models.user import Meal
+from app.utils.storage import AttachmentStore
+
+Image = pytest.importorskip('PIL.Image')
+
+
+def png():
+    salida = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(salida, 'PNG')
+    return salida.getvalue()
+
+
+@pytest.fixture
+def meal(client):
+    client.post('/sync', json={'token': 0, 'meals': [{
+        'client_id': 'm1', 'updated_at': '2026-03-02T08:00:00Z', 'name': 'Avena',
+        'date': '2026-03-02', 'protein': 10, 'carbs': 50, 'fat': 5}]})
+    return 'm1'
+
+
+def subir(client, meal, datos, nombre, mimetype):
+    return client.post(f'/meals/{meal}/attachments',
+                       data={'file': (io.BytesIO(datos), nombre, mimetype)},
+                       content_type='multipart/form-data')
+
+
+def test_el_tipo_se_deduce_del_contenido(client, meal):
+    respuesta = subir(client, meal, png(), 'foto.txt', 'text/plain')
+    assert respuesta.status_code == 201
+    with client.application.app_context():
+        assert Attachment.query.one().content_type == 'image/png'
+
+    descarga = client.get(f"/attachments/{respuesta.get_json()['id']}")
+    assert descarga.mimetype == 'image/png'
+    assert descarga.headers['X-Content-Type-Options'] == 'nosniff'
+
+
+def test_svg_y_falsos_se_rechazan(client, meal):
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+    assert subir(client, meal, svg, 'x.svg', 'image/svg+xml').status_code == 400
+    assert subir(client, meal, b'no soy un png', 'x.png', 'image/png').status_code == 400
+
+
+def test_attachment_store_es_abstracto():
+    with pytest.raises(TypeError):
+        AttachmentStore()
+
+
+def test_formulario_rechaza_extension_falsa(client):
+    respuesta = client.post('/add_meal', data={
+        'name': 'Avena', 'date': '2026-03-02', 'protein': 10, 'carbs': 50, 'fat': 5,
+        'foto': (io.BytesIO(b'<svg xmlns="http://www.w3.org/2000/svg"/>'), 'x.png', 'image/png'),
+    }, content_type='multipart/form-data')
+    assert respuesta.status_code == 200
+    with client.application.app_context():
+        assert Meal.query.count() == 0
+        assert Attachment.query.count() == 0
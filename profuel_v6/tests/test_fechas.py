@@ -0,0 +1,48 @@
+from datetime import timezone
+
+from app.models.user import Profile
+from app.utils import fechas
+from app.utils.fechas import zona
+
+
+def test_zona_invalida_usa_la_por_defecto(app):
+    with app.app_context():
+        assert str(zona('Marte/Olympus')) == 'Europe/Madrid'
+        assert str(zona(None)) == 'Europe/Madrid'
+
+
+def test_sin_zona_por_defecto_valida_acaba_en_utc(app):
+    app.config['DEFAULT_TIMEZONE'] = 'Marte/Olympus'
+    with app.app_context():
+        assert zona('Tampoco/Existe') is timezone.utc
+
+
+def test_formulario_de_perfil_usa_la_zona_configurada(app, client):
+    app.config['DEFAULT_TIMEZONE'] = 'America/Bogota'
+    html = client.get('/profile').get_data(as_text=True)
+    assert '<option selected>America/Bogota</option>' in html
+
+
+def test_solo_se_ofrecen_zonas_area_ciudad(app, client):
+    html = client.get('/profile').get_data(as_text=True)
+    assert '<option>Europe/Lisbon</option>' in html
+    assert '<option>UTC</option>' in html
+    for nombre in ('localtime', 'Factory', 'Etc/GMT+5', 'US/Eastern', 'posix/Europe/Madrid'):
+        assert f'>{nombre}<' not in html
+    assert len(html.encode()) < 20000
+
+
+def test_sin_base_de_zonas_el_formulario_sigue_validando(app, client, monkeypatch):
+    monkeypatch.setattr(fechas, 'zonas_canonicas', lambda: frozenset())
+    fechas._zonas_validas.cache_clear()
+    try:
+        with app.test_request_context():
+            assert fechas.zonas_validas() == ('Europe/Madrid', 'UTC')
+        respuesta = client.post('/profile', data={'sexo': 'F', 'altura': 165, 'peso': 60,
+                                                  'fecha_nacimiento': '1990-01-01', 'actividad': '1.55',
+                                                  'timezone': 'UTC'})
+        assert respuesta.status_code == 302
+        with app.app_context():
+            assert Profile.query.one().timezone == 'UTC'
+    finally:
+        fechas._zonas_validas.cache_clear()
@@ -0,0 +1,82 @@
+import sqlite3
+from datetime import date
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models.user import Meal, User
+
+# Esquema de la versión anterior a la sincronización (instance/profuel.db original)
+ESQUEMA_ANTERIOR = """
+CREATE TABLE user (id INTEGER NOT NULL, email VARCHAR(150) NOT NULL, password VARCHAR(150) NOT NULL,
+                   PRIMARY KEY (id), UNIQUE (email));
+CREATE TABLE profile (id INTEGER NOT NULL, user_id INTEGER NOT NULL, sexo VARCHAR(10), altura FLOAT, peso FLOAT,
+                      fecha_nacimiento DATE, actividad FLOAT, PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id));
+CREATE TABLE meal (id INTEGER NOT NULL, user_id INTEGER NOT NULL, name VARCHAR(150) NOT NULL, date DATE NOT NULL,
+                   protein FLOAT NOT NULL, carbs FLOAT NOT NULL, fat FLOAT NOT NULL, kcal FLOAT NOT NULL,
+                   PRIMARY KEY (id), FOREIGN KEY(user_id) REFERENCES user (id));
+"""
+
+
+def base_anterior(ruta, emails):
+    conexion = sqlite3.connect(ruta)
+    conexion.executescript(ESQUEMA_ANTERIOR)
+    conexion.executemany('INSERT INTO user (email, password) VALUES (?, ?)', [(e, generate_password_hash('x')) for e in emails])
+    conexion.execute("INSERT INTO profile (user_id, sexo, altura, peso, fecha_nacimiento, actividad) "
+                     "VALUES (1, 'F', 165, 60, '1990-01-01', 1.55)")
+    conexion.execute("INSERT INTO meal (user_id, name, date, protein, carbs, fat, kcal) "
+                     "VALUES (1, 'Avena', '2025-06-05', 10, 50, 5, 285)")
+    conexion.commit()
+    conexion.close()
+
+
+def migrate(app):
+    # Con "python -m app.cli" FlaskGroup ya activa el contexto; el runner de pruebas no
+    with app.app_context():
+        return app.test_cli_runner().invoke(args=['migrate'])
+
+
+def abrir(ruta, tmp_path):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{ruta}', 'WTF_CSRF_ENABLED': False,
+                       'ATTACHMENT_ROOT': str(tmp_path / 'attachments')})
+
+
+def test_migra_una_base_anterior(tmp_path):
+    ruta = tmp_path / 'profuel.db'
+    base_anterior(ruta, ['Ana@Example.com '])
+    app = abrir(ruta, tmp_path)
+
+    with app.app_context():
+        assert User.query.one().email_normalized == 'ana@example.com'
+        meal = Meal.query.one()
+        assert meal.day_key == date(2025, 6, 5).toordinal()
+        assert meal.client_id and meal.updated_at and meal.deleted is False
+
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': 'ana@example.com', 'password': 'x'})
+    respuesta = cliente.post('/sync', json={'token': 0})
+    assert respuesta.status_code == 200
+    assert [m['name'] for m in respuesta.get_json()['meals']] == ['Avena']
+
+    indices = {fila[1] for fila in sqlite3.connect(ruta).execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+    assert {'ix_user_email_normalized', 'uq_meal_user_client', 'ix_meal_user_day'} <= indices
+
+
+def test_duplicados_por_mayusculas_se_informan_sin_indice(tmp_path):
+    ruta = tmp_path / 'profuel.db'
+    base_anterior(ruta, ['ana@example.com', 'ANA@example.com'])
+    app = abrir(ruta, tmp_path)
+
+    resultado = migrate(app)
+    assert resultado.exit_code == 1
+    assert 'ana@example.com: ids 1, 2' in resultado.output
+
+    indices = {fila[1] for fila in sqlite3.connect(ruta).execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+    assert 'ix_user_email_normalized' not in indices
+
+    with app.app_context():
+        db.session.execute(db.delete(User).where(User.id == 2))
+        db.session.commit()
+    resultado = migrate(app)
+    assert resultado.exit_code == 0
+    assert 'ix_user_email_normalized' in resultado.output
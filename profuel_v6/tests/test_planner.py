@@ -0,0 +1,111 @@
+import random
+from datetime import date, datetime
+from itertools import combinations_with_replacement
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import db
+from app.models.user import Profile
+from app.utils import planner
+from app.utils.planner import (CUBOS, MAX_RACIONES, Candidato, cubo, error, invalidar_plan, planificar,
+                               resolver)
+
+HOY = date(2026, 3, 2)
+
+
+def candidato(name, protein, carbs, fat):
+    return Candidato(name, 4 * protein + 4 * carbs + 9 * fat, protein, carbs, fat, 1)
+
+
+def test_resolver_encuentra_la_combinacion_exacta():
+    avena, pollo, aceite = candidato('Avena', 10, 60, 5), candidato('Pollo', 30, 0, 3), candidato('Aceite', 0, 0, 10)
+    objetivo = tuple(2 * a + b for a, b in zip(avena[1:5], pollo[1:5]))
+    assert resolver([avena, pollo, aceite], objetivo) == [(avena, 2), (pollo, 1)]
+
+
+def test_resolver_sin_hueco_no_propone_nada():
+    assert resolver([candidato('Avena', 10, 60, 5)], (0, 0, 0, 0)) == []
+    assert resolver([], (2000, 150, 200, 60)) == []
+
+
+def test_resolver_coincide_con_la_fuerza_bruta():
+    # La poda no debe descartar nunca la mejor combinación
+    rng = random.Random(7)
+    for _ in range(20):
+        candidatos = [candidato(f'c{i}', rng.randint(0, 40), rng.randint(0, 80), rng.randint(0, 30)) for i in range(6)]
+        objetivo = (rng.randint(0, 2500), rng.randint(0, 150), rng.randint(0, 250), rng.randint(0, 80))
+        mejor = min(error(tuple(sum(c[k] for c in combinacion) for k in range(1, 5)), objetivo)
+                    for n in range(MAX_RACIONES + 1)
+                    for combinacion in combinations_with_replacement(candidatos, n))
+        raciones = resolver(candidatos, objetivo)
+        totales = tuple(sum(c[k] * n for c, n in raciones) for k in range(1, 5))
+        assert error(totales, objetivo) == pytest.approx(mejor)
+
+
+def test_cubo_redondea_y_no_admite_negativos():
+    assert cubo((1024, 12, -30, 7)) == (20, 2, 0, 1)
+    assert tuple(n * paso for n, paso in zip(cubo((1024, 12, 0, 7)), CUBOS)) == (1000, 10, 0, 5)
+
+
+@pytest.fixture
+def contadores(app, monkeypatch):
+    llamadas = {'candidatos': 0, 'resolver': 0}
+    candidatos_originales, resolver_original = planner.candidatos_frecuentes, planner.resolver
+
+    def candidatos_frecuentes(user_id, hoy):
+        llamadas['candidatos'] += 1
+        return candidatos_originales(user_id, hoy)
+
+    def resolver_contado(candidatos, objetivo):
+        llamadas['resolver'] += 1
+        return resolver_original(candidatos, objetivo)
+
+    monkeypatch.setattr(planner, 'candidatos_frecuentes', candidatos_frecuentes)
+    monkeypatch.setattr(planner, 'resolver', resolver_contado)
+    return llamadas
+
+
+def test_cache_por_cubo_y_por_dia(app, contadores):
+    with app.app_context():
+        planificar(1, HOY, (1000, 50, 100, 30))
+        planificar(1, HOY, (1010, 51, 101, 31))  # mismo cubo
+        assert contadores == {'candidatos': 1, 'resolver': 1}
+
+        planificar(1, HOY, (500, 50, 100, 30))
+        assert contadores == {'candidatos': 1, 'resolver': 2}
+
+        invalidar_plan(1)
+        planificar(1, HOY, (500, 50, 100, 30))
+        # Tras invalidar se recalcula el plan, pero los candidatos siguen precalculados
+        assert contadores == {'candidatos': 1, 'resolver': 3}
+
+        planificar(1, date(2026, 3, 3), (500, 50, 100, 30))
+        assert contadores == {'candidatos': 2, 'resolver': 4}
+
+
+def test_add_meal_y_sync_invalidan_los_planes(app, client):
+    with app.app_context():
+        db.session.add(Profile(user_id=1, sexo='F', altura=165, peso=60, fecha_nacimiento=date(1990, 1, 1)))
+        db.session.commit()
+    cache = app.extensions['planner']
+    hoy = datetime.now(ZoneInfo('Europe/Madrid')).date()
+
+    assert client.get('/plan').status_code == 200
+    assert cache.usuarios[1]['planes'] and cache.usuarios[1]['candidatos'] is not None
+
+    client.post('/add_meal', data={'name': 'Pasta', 'date': hoy.isoformat(), 'protein': 20, 'carbs': 80, 'fat': 10})
+    assert cache.usuarios[1]['planes'] == {}
+    assert cache.usuarios[1]['candidatos'] is not None
+
+    client.get('/plan')
+    assert cache.usuarios[1]['planes']
+    client.post('/sync', json={'token': 0, 'meals': [{
+        'client_id': 'x', 'updated_at': '2026-03-02T08:00:00Z', 'name': 'Avena',
+        'date': hoy.isoformat(), 'protein': 10, 'carbs': 50, 'fat': 5}]})
+    assert cache.usuarios[1]['planes'] == {}
+
+    # Un sync sin cambios aceptados no invalida nada
+    client.get('/plan')
+    client.post('/sync', json={'token': 0})
+    assert cache.usuarios[1]['planes']
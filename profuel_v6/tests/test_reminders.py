@@ -0,0 +1,123 @@
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from app import db
+from app.models.reminder import ReminderPreference
+from app.models.user import Meal, Profile, User
+from app.utils.reminders import LogSink, NotificationSink, ReminderScheduler, programar, siguiente_disparo
+
+# 2026-03-02 19:00 UTC son las 20:00 en Madrid y las 14:00 en Bogotá
+AHORA = datetime(2026, 3, 2, 19, 0)
+
+
+class Capturador(NotificationSink):
+    def __init__(self):
+        self.avisos = []
+
+    def send(self, avisos):
+        self.avisos.extend(u for u, _ in avisos)
+
+
+def usuario(user_id, tz='Europe/Madrid', hora=time(20, 0), next_fire_at=AHORA):
+    db.session.add(User(id=user_id, email=f'u{user_id}@example.com', password='x'))
+    db.session.add(Profile(user_id=user_id, sexo='F', altura=165, peso=60, fecha_nacimiento=date(1990, 1, 1),
+                           timezone=tz))
+    db.session.add(ReminderPreference(user_id=user_id, hora=hora, next_fire_at=next_fire_at))
+
+
+def test_un_tick_fallido_no_para_el_scheduler(app, caplog):
+    ticks = []
+
+    def tick():
+        ticks.append(1)
+        if len(ticks) == 1:
+            raise RuntimeError('base de datos bloqueada')
+        if len(ticks) == 3:
+            raise KeyboardInterrupt
+
+    with app.app_context():
+        scheduler = ReminderScheduler(LogSink())
+        scheduler.tick = tick
+        with pytest.raises(KeyboardInterrupt):
+            scheduler.ejecutar(0)
+
+    assert len(ticks) == 3
+    assert 'Fallo en el tick de recordatorios' in caplog.text
+
+
+def test_max_por_tick_acota_cada_tick(app):
+    with app.app_context():
+        for user_id in range(1, 6):
+            usuario(user_id)
+        db.session.commit()
+        sink = Capturador()
+        scheduler = ReminderScheduler(sink, max_por_tick=2)
+        assert [scheduler.tick(AHORA) for _ in range(4)] == [2, 2, 1, 0]
+        assert sorted(sink.avisos) == [1, 2, 3, 4, 5]
+
+
+def test_no_avisa_a_quien_ya_registro_comida_en_su_dia_local(app):
+    with app.app_context():
+        usuario(1)
+        usuario(2)
+        usuario(3)
+        db.session.add(Meal(user_id=1, name='Avena', date=date(2026, 3, 2), protein=1, carbs=1, fat=1, kcal=17))
+        # La de ayer no cuenta
+        db.session.add(Meal(user_id=2, name='Avena', date=date(2026, 3, 1), protein=1, carbs=1, fat=1, kcal=17))
+        db.session.commit()
+        sink = Capturador()
+        assert ReminderScheduler(sink).tick(AHORA) == 3
+        assert sink.avisos == [2, 3]
+        # Aunque no se avise, el siguiente disparo avanza
+        assert all(p.next_fire_at > AHORA for p in ReminderPreference.query)
+
+
+def test_next_fire_at_es_la_hora_local_del_usuario(app):
+    with app.app_context():
+        usuario(1, tz='Europe/Madrid')
+        usuario(2, tz='America/Bogota', next_fire_at=AHORA - timedelta(minutes=1))
+        db.session.commit()
+        ReminderScheduler(Capturador()).tick(AHORA)
+        proximos = {p.user_id: p.next_fire_at for p in ReminderPreference.query}
+        assert proximos == {1: datetime(2026, 3, 3, 19, 0), 2: datetime(2026, 3, 3, 1, 0)}
+
+
+def test_siguiente_disparo_respeta_el_cambio_de_hora():
+    madrid = ZoneInfo('Europe/Madrid')
+    # El 29 de marzo de 2026 Madrid pasa a UTC+2: las 20:00 locales son las 18:00 UTC
+    assert siguiente_disparo(time(20, 0), datetime(2026, 3, 28, 19, 30), madrid) == datetime(2026, 3, 29, 18, 0)
+    assert siguiente_disparo(time(20, 0), datetime(2026, 3, 28, 18, 30), madrid) == datetime(2026, 3, 28, 19, 0)
+
+
+def test_recordatorio_movido_dentro_de_la_ventana_no_se_retrasa(app):
+    with app.app_context():
+        usuario(1, next_fire_at=AHORA + timedelta(hours=3))
+        db.session.commit()
+        sink = Capturador()
+        scheduler = ReminderScheduler(sink)
+        assert scheduler.tick(AHORA) == 0
+
+        # La web mueve el recordatorio a dentro de un minuto, dentro de la ventana ya cargada
+        pref = ReminderPreference.query.one()
+        pref.hora = time(20, 1)
+        programar(pref, ZoneInfo('Europe/Madrid'))
+        pref.next_fire_at = AHORA + timedelta(minutes=1)
+        db.session.commit()
+
+        assert scheduler.tick(AHORA + timedelta(minutes=1)) == 1
+        assert sink.avisos == [1]
+
+
+def test_ticks_sin_cambios_no_recargan(app, monkeypatch):
+    with app.app_context():
+        usuario(1, next_fire_at=AHORA + timedelta(hours=3))
+        db.session.commit()
+        scheduler = ReminderScheduler(Capturador())
+        recargas = []
+        original = scheduler.recargar
+        monkeypatch.setattr(scheduler, 'recargar', lambda *a: recargas.append(1) or original(*a))
+        for segundo in range(10):
+            scheduler.tick(AHORA + timedelta(seconds=segundo))
+        assert len(recargas) == 1
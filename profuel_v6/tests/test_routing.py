@@ -0,0 +1,60 @@
+import shutil
+import time
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+import sqlalchemy as sa
+from flask import g
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models.user import Meal, Profile, User
+
+PIN = 0.3
+
+
+@pytest.fixture
+def app(tmp_path):
+    primario, replica = tmp_path / 'profuel.db', tmp_path / 'replica.db'
+    config = {'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primario}', 'WTF_CSRF_ENABLED': False,
+              'ATTACHMENT_ROOT': str(tmp_path / 'attachments')}
+    with create_app(config).app_context():
+        db.session.add(User(email='ana@example.com', password=generate_password_hash('x')))
+        db.session.add(Profile(user_id=1, sexo='F', altura=165, peso=60, fecha_nacimiento=date(1990, 1, 1)))
+        db.session.commit()
+    # Una copia de solo lectura que no recibe las escrituras: así se sabe de dónde sale cada lectura
+    shutil.copy(primario, replica)
+    return create_app({**config, 'REPLICA_DATABASE_URI': f'sqlite:///file:{replica}?mode=ro&uri=true',
+                       'REPLICA_PIN_SECONDS': PIN})
+
+
+def test_get_bind_lecturas_a_la_replica_y_escrituras_al_primario(app):
+    with app.test_request_context():
+        assert db.session.get_bind(mapper=Meal) is db.engine
+        g.lectura_replica = True
+        assert db.session.get_bind(mapper=Meal) is db.engines['replica']
+        assert db.session.get_bind(clause=sa.update(Meal)) is db.engine
+        assert db.session.get_bind(clause=sa.insert(Meal)) is db.engine
+        # El flush va al primario aunque la vista lea de la réplica (que además es de solo lectura)
+        db.session.add(User(email='luis@example.com', password='x'))
+        db.session.commit()
+    with app.app_context():
+        assert User.query.count() == 2
+        with pytest.raises(sa.exc.OperationalError):
+            with db.engines['replica'].begin() as conexion:
+                conexion.exec_driver_sql("DELETE FROM user")
+
+
+def test_dashboard_lee_del_primario_hasta_que_vence_el_pin(app):
+    client = app.test_client()
+    client.post('/login', data={'email': 'ana@example.com', 'password': 'x'})
+    assert 'Total kcal consumidas hoy: 0 kcal' in client.get('/dashboard').get_data(as_text=True)
+
+    hoy = datetime.now(ZoneInfo('Europe/Madrid')).date()
+    client.post('/add_meal', data={'name': 'Pasta', 'date': hoy.isoformat(), 'protein': 100, 'carbs': 100, 'fat': 50})
+    # Lee-tus-escrituras: justo después del commit, el dashboard lee del primario
+    assert 'Total kcal consumidas hoy: 1250 kcal' in client.get('/dashboard').get_data(as_text=True)
+
+    time.sleep(PIN + 0.1)
+    assert 'Total kcal consumidas hoy: 0 kcal' in client.get('/dashboard').get_data(as_text=True)
@@ -0,0 +1,109 @@
+import sqlite3
+from datetime import date
+
+from werkzeug.security import generate_password_hash
+
+from app import create_app, db
+from app.models.attachment import Attachment
+from app.models.user import Meal, User
+from app.utils.shards import en_shard_de, rebalancear, shard_para
+
+USUARIOS = 6
+
+
+def abrir(tmp_path, n_shards):
+    return create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{tmp_path}/profuel.db',
+                       'MEAL_SHARDS': n_shards, 'MEAL_SHARD_URI': f'sqlite:///{tmp_path}/meals_{{}}.db',
+                       'WTF_CSRF_ENABLED': False, 'ATTACHMENT_ROOT': str(tmp_path / 'attachments')})
+
+
+def poblar(app):
+    with app.app_context():
+        for u in range(1, USUARIOS + 1):
+            db.session.add(User(email=f'u{u}@example.com', password=generate_password_hash('x')))
+        db.session.commit()
+        for u in range(1, USUARIOS + 1):
+            # Ids de comida intercalados entre usuarios para que el movimiento tenga que remapearlos
+            for k in range(3):
+                meal = Meal(user_id=u, client_id=f'u{u}-m{k}', name='Avena', date=date(2026, 3, 2),
+                            protein=10, carbs=50, fat=5, kcal=285)
+                db.session.add(meal)
+                db.session.flush()
+                db.session.add(Attachment(user_id=u, meal_id=meal.id, sha256='0' * 64, filename=meal.client_id,
+                                          content_type='image/png', size=1))
+        db.session.commit()
+
+
+def cliente(app, user_id):
+    client = app.test_client()
+    client.post('/login', data={'email': f'u{user_id}@example.com', 'password': 'x'})
+    return client
+
+
+def sync(client, **payload):
+    respuesta = client.post('/sync', json=payload)
+    assert respuesta.status_code == 200
+    return respuesta.get_json()
+
+
+def filas_por_fichero(tmp_path, n_shards):
+    ficheros = [tmp_path / 'profuel.db'] + [tmp_path / f'meals_{i}.db' for i in range(n_shards)]
+    resultado = {}
+    for fichero in ficheros:
+        if not fichero.exists():
+            continue
+        conexion = sqlite3.connect(fichero)
+        if conexion.execute("SELECT 1 FROM sqlite_master WHERE name = 'meal'").fetchone():
+            resultado[fichero.name] = {u for (u,) in conexion.execute('SELECT DISTINCT user_id FROM meal')}
+        conexion.close()
+    return resultado
+
+
+def comprobar(app, tmp_path, n_shards):
+    # Cada usuario está en un único fichero, el suyo, y sus adjuntos apuntan a las mismas comidas
+    esperado = {f'meals_{i}.db': {u for u in range(1, USUARIOS + 1) if shard_para(u, n_shards) == i}
+                for i in range(n_shards)}
+    assert {k: v for k, v in filas_por_fichero(tmp_path, n_shards).items() if v} == \
+           {k: v for k, v in esperado.items() if v}
+    with app.app_context():
+        for u in range(1, USUARIOS + 1):
+            # Los ids de comida se repiten entre shards: cada usuario con su propio mapa de identidad
+            db.session.expunge_all()
+            with en_shard_de(u):
+                adjuntos = Attachment.query.filter_by(user_id=u).all()
+                assert len(adjuntos) == 3
+                for adjunto in adjuntos:
+                    assert db.session.get(Meal, adjunto.meal_id).client_id == adjunto.filename
+
+
+def test_rebalanceo_0_2_3_conserva_adjuntos_y_tokens(tmp_path):
+    app = abrir(tmp_path, 0)
+    poblar(app)
+    token = sync(cliente(app, 1), token=0, meals=[
+        {'client_id': 'antes', 'updated_at': '2026-03-02T08:00:00Z', 'name': 'Antes',
+         'date': '2026-03-02', 'protein': 1, 'carbs': 1, 'fat': 1}])['token']
+
+    app = abrir(tmp_path, 2)
+    with app.app_context():
+        assert rebalancear(db, 0)['usuarios'] == USUARIOS
+    comprobar(app, tmp_path, 2)
+    # Otro dispositivo escribe después del movimiento; el token antiguo debe verlo
+    sync(cliente(app, 1), token=0, meals=[
+        {'client_id': 'tras-2', 'updated_at': '2026-03-02T09:00:00Z', 'name': 'Tras 2',
+         'date': '2026-03-02', 'protein': 1, 'carbs': 1, 'fat': 1}])
+    assert 'tras-2' in {m['client_id'] for m in sync(cliente(app, 1), token=token)['meals']}
+
+    app = abrir(tmp_path, 3)
+    with app.app_context():
+        rebalancear(db, 2)
+    comprobar(app, tmp_path, 3)
+    sync(cliente(app, 1), token=0, meals=[
+        {'client_id': 'tras-3', 'updated_at': '2026-03-02T10:00:00Z', 'name': 'Tras 3',
+         'date': '2026-03-02', 'protein': 1, 'carbs': 1, 'fat': 1}])
+    recibidas = {m['client_id'] for m in sync(cliente(app, 1), token=token)['meals']}
+    assert {'tras-2', 'tras-3'} <= recibidas
+
+    # Repetir el rebalanceo no mueve nada
+    with app.app_context():
+        assert rebalancear(db, 3)['usuarios'] == 0
+    comprobar(app, tmp_path, 3)
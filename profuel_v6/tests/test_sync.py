@@ -0,0 +1,166 @@
+from datetime import date
+
+from app import db
+from app.models.sync import ChangeLog
+from app.models.user import Meal, Profile, User
+
+
+def comida(client_id, updated_at, **campos):
+    item = {'client_id': client_id, 'updated_at': updated_at, 'name': 'Avena',
+            'date': '2026-03-02', 'protein': 10, 'carbs': 50, 'fat': 5}
+    item.update(campos)
+    return item
+
+
+def sync(client, **payload):
+    respuesta = client.post('/sync', json=payload)
+    return respuesta.status_code, respuesta.get_json()
+
+
+def test_nueva_comida_se_acepta_y_avanza_el_token(client):
+    estado, datos = sync(client, token=0, meals=[comida('a', '2026-03-02T08:00:00Z')])
+    assert estado == 200
+    assert datos['accepted'] == ['a']
+    assert datos['token'] > 0
+    assert [m['client_id'] for m in datos['meals']] == ['a']
+
+
+def test_last_writer_wins(client):
+    _, datos = sync(client, token=0, meals=[comida('a', '2026-03-02T08:00:00Z', name='Nueva')])
+    token = datos['token']
+
+    _, datos = sync(client, token=token, meals=[comida('a', '2026-03-02T07:00:00Z', name='Vieja')])
+    assert datos['rejected'] == ['a']
+    # El cliente recibe la versión ganadora para sobrescribir la suya
+    assert [m['name'] for m in datos['meals']] == ['Nueva']
+    assert datos['token'] == token
+
+    _, datos = sync(client, token=token, meals=[comida('a', '2026-03-02T09:00:00Z', name='Final')])
+    assert datos['accepted'] == ['a']
+    assert datos['token'] > token
+    with client.application.app_context():
+        assert Meal.query.filter_by(client_id='a').one().name == 'Final'
+
+
+def test_tombstone_se_propaga_y_no_crea_filas(client):
+    _, datos = sync(client, token=0, meals=[comida('a', '2026-03-02T08:00:00Z')])
+    token = datos['token']
+
+    _, datos = sync(client, token=token, meals=[
+        {'client_id': 'a', 'updated_at': '2026-03-02T09:00:00Z', 'deleted': True},
+        {'client_id': 'b', 'updated_at': '2026-03-02T09:00:00Z', 'deleted': True},
+    ])
+    assert datos['accepted'] == ['a']
+    # Lo aceptado no se reenvía al mismo dispositivo, pero otro con el token anterior recibe la lápida
+    assert datos['meals'] == []
+    _, otro = sync(client, token=token)
+    assert [(m['client_id'], m['deleted']) for m in otro['meals']] == [('a', True)]
+    with client.application.app_context():
+        assert Meal.query.filter_by(client_id='b').first() is None
+
+    # Un segundo dispositivo que parte de cero no recibe la comida borrada
+    _, datos = sync(client, token=0)
+    assert datos['meals'] == []
+
+
+def test_token_solo_devuelve_cambios_posteriores(client):
+    _, datos = sync(client, token=0, meals=[comida('a', '2026-03-02T08:00:00Z')])
+    token = datos['token']
+    _, datos = sync(client, token=token, meals=[comida('b', '2026-03-02T08:00:00Z')])
+    _, datos = sync(client, token=token)
+    assert [m['client_id'] for m in datos['meals']] == ['b']
+    _, datos = sync(client, token=datos['token'])
+    assert datos['meals'] == []
+
+
+def test_usuario_sin_log_no_vuelve_a_descargarlo_todo(client):
+    with client.application.app_context():
+        user = User.query.one()
+        db.session.add(Meal(user_id=user.id, name='Sembrada', date=date(2026, 3, 1),
+                            protein=1, carbs=1, fat=1, kcal=17))
+        db.session.commit()
+
+    _, datos = sync(client, token=0)
+    assert [m['name'] for m in datos['meals']] == ['Sembrada']
+    assert datos['token'] > 0
+    _, datos = sync(client, token=datos['token'])
+    assert datos['meals'] == []
+
+
+def test_token_de_otro_usuario_sirve_como_secuencia_global(app, client):
+    with app.app_context():
+        db.session.add(User(email='otro@example.com', password='x'))
+        db.session.flush()
+        otro = User.query.filter_by(email='otro@example.com').one()
+        for _ in range(3):
+            db.session.add(ChangeLog(user_id=otro.id, entity='profile', entity_id='profile'))
+        db.session.commit()
+        global_max = db.session.query(db.func.max(ChangeLog.id)).scalar()
+
+    _, datos = sync(client, token=0)
+    assert datos['token'] == global_max
+
+
+def test_payload_invalido_devuelve_400_sin_escribir(client):
+    invalidos = [
+        [comida('a', '2026-03-02T08:00:00Z', name=None)],
+        [comida('a', '2026-03-02T08:00:00Z', name='  ')],
+        [comida('a', '2026-03-02T08:00:00Z', protein='nan')],
+        [comida('a', '2026-03-02T08:00:00Z', carbs=-1)],
+        [comida('a', '2026-03-02T08:00:00Z', fat=True)],
+        [comida('a', '2026-03-02T08:00:00Z', date='2026-02-30')],
+        [comida('a', None)],
+        [comida('ok', '2026-03-02T08:00:00Z'), comida('b', '2026-03-02T08:00:00Z', protein='inf')],
+    ]
+    for meals in invalidos:
+        estado, datos = sync(client, token=0, meals=meals)
+        assert estado == 400, meals
+        assert 'error' in datos
+
+    estado, _ = sync(client, token=0, profile={'updated_at': '2026-03-02T08:00:00Z', 'altura': 'abc'})
+    assert estado == 400
+    estado, _ = sync(client, token=0, profile={'updated_at': '2026-03-02T08:00:00Z', 'sexo': 'X'})
+    assert estado == 400
+
+    with client.application.app_context():
+        assert Meal.query.count() == 0
+
+
+def test_timezone_del_perfil_se_valida(client):
+    perfil = {'updated_at': '2026-03-02T08:00:00Z', 'sexo': 'F', 'altura': 165, 'peso': 60,
+              'fecha_nacimiento': '1990-01-01', 'actividad': 1.55}
+    estado, _ = sync(client, token=0, profile=dict(perfil, timezone='Marte/Olympus'))
+    assert estado == 400
+    estado, _ = sync(client, token=0, profile=dict(perfil, timezone='America/Bogota'))
+    assert estado == 200
+    with client.application.app_context():
+        assert Profile.query.one().timezone == 'America/Bogota'
+
+
+def test_perfil_nuevo_incompleto_se_rechaza(client):
+    estado, _ = sync(client, token=0, profile={'updated_at': '2026-03-02T08:00:00Z', 'timezone': 'America/Bogota'})
+    assert estado == 400
+    with client.application.app_context():
+        assert Profile.query.count() == 0
+    assert client.get('/dashboard').status_code == 302
+
+
+def test_perfil_existente_admite_cambios_parciales(client):
+    perfil = {'updated_at': '2026-03-02T08:00:00Z', 'sexo': 'F', 'altura': 165, 'peso': 60,
+              'fecha_nacimiento': '1990-01-01'}
+    assert sync(client, token=0, profile=perfil)[0] == 200
+    estado, _ = sync(client, token=0, profile={'updated_at': '2026-03-02T09:00:00Z', 'peso': 59})
+    assert estado == 200
+    with client.application.app_context():
+        assert Profile.query.one().peso == 59
+    assert client.get('/dashboard').status_code == 200
+
+
+def test_token_fuera_de_rango_no_escribe(client):
+    for token in (10 ** 30, -1, 'abc', True, 1.5e300):
+        estado, _ = sync(client, token=token, meals=[comida('a', '2026-03-02T08:00:00Z')])
+        assert estado == 400, token
+    respuesta = client.post('/sync', data='{"token": Infinity}', content_type='application/json')
+    assert respuesta.status_code == 400
+    with client.application.app_context():
+        assert Meal.query.count() == 0